@@ -1,16 +1,30 @@
+from __future__ import annotations
+
 from datetime import datetime
-from fileinput import filename
-import yfinance as yf
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 import config
-
+import metrics
+
+from fetch_engine import map_symbols
+from history import HistoryStore
+from universe import record_quotes
+from checkpoint import Checkpoint
+from estimators import estimate as estimate_eps
+from dividend_store import DividendStore, dividend_events
+from statements import StatementStore, statement_rows
 from data_fetcher import (
+    SymbolSnapshot,
     get_price,
+    get_prices_bulk,
     get_trailing_eps,
-    get_shares_outstanding,
-    get_dividend_by_year,
 )
 
+if TYPE_CHECKING:
+    import yfinance as yf
+
 
 def avg_payout_ratio(div_by_year: dict, eps_ttm: float, years: int):
     """Average payout ratio over last N years: annual_dividend / eps_ttm."""
@@ -28,6 +42,26 @@ def avg_payout_ratio(div_by_year: dict, eps_ttm: float, years: int):
     return sum(ratios) / len(ratios)
 
 
+def quarterly_eps_by_date(tk: yf.Ticker):
+    """Quarter EPS = quarterly net income / sharesOutstanding, indexed by quarter end.
+
+    Keeps the statement's column order (most recent first in many yfinance
+    outputs). Returns None if shares or the net income row are unavailable.
+    Parsing is statements.statement_rows; see StatementStore for the
+    stored copy the yield modes read.
+    """
+    rows = statement_rows(tk)
+    if not rows:
+        return None
+    return pd.Series([eps for *_, eps in rows], index=pd.DatetimeIndex([q for q, *_ in rows]))
+
+
+def quarterly_eps_series(tk: yf.Ticker):
+    """Quarter EPS series as list[float] (see quarterly_eps_by_date), or None."""
+    eps_q = quarterly_eps_by_date(tk)
+    return None if eps_q is None else eps_q.tolist()
+
+
 def estimate_next_quarter_eps_from_quarterly(tk: yf.Ticker):
     """Estimate next-quarter EPS using quarterly net income / shares.
 
@@ -35,7 +69,7 @@ def estimate_next_quarter_eps_from_quarterly(tk: yf.Ticker):
       1) sharesOutstanding from tk.info
       2) quarterly income statement net income row
       3) quarter EPS series = netIncome / shares
-      4) next-quarter EPS = conservative weighted moving average of recent quarters
+      4) next-quarter EPS = simple average of the 3 most recent quarters
 
     Returns:
       (eps_q_series, next_q_eps_est)
@@ -43,145 +77,356 @@ def estimate_next_quarter_eps_from_quarterly(tk: yf.Ticker):
       - next_q_eps_est: float
       or (None, None) if insufficient.
     """
-    shares = get_shares_outstanding(tk)
-    if not shares:
-        return None, None
-
-    stmt = None
-    try:
-        stmt = tk.quarterly_income_stmt
-    except Exception:
-        stmt = None
-
-    if stmt is None or getattr(stmt, "empty", True):
-        try:
-            stmt = tk.quarterly_financials  # older yfinance
-        except Exception:
-            stmt = None
-
-    if stmt is None or getattr(stmt, "empty", True):
-        return None, None
-
-    # Find net income row (yfinance label varies)
-    net_income_row = None
-    for key in [
-        "Net Income",
-        "NetIncome",
-        "Net Income Common Stockholders",
-        "Net Income Continuous Operations",
-    ]:
-        if key in stmt.index:
-            net_income_row = key
-            break
-
-    if net_income_row is None:
-        return None, None
-
-    net_incomes = stmt.loc[net_income_row].dropna()
-    if net_incomes.empty:
+    eps_q_series = quarterly_eps_series(tk)
+    if not eps_q_series:
         return None, None
 
-    # Compute quarter EPS series
-    eps_q_series = (net_incomes.astype(float) / shares).tolist()
-
     if len(eps_q_series) < 2:
         return eps_q_series, float(eps_q_series[-1])
 
-    # ✅ 這裡只修你貼的原檔那個「註解縮排會炸」的問題（不改邏輯）
     # Simple average of recent 3 quarters (align with "use first three quarters to estimate next")
     recent = eps_q_series[:3]
-    if not recent:
-        return None, None
     next_q_eps_est = sum(recent) / len(recent)
 
     return eps_q_series, float(next_q_eps_est)
 
 
-def estimate_yield_for_symbol(symbol: str, years_for_payout: int, trigger_reasons=None):
-    """Compute estimated yield based on Next-Q EPS estimate.
+def collect_yield_inputs(symbol: str, snapshot=None, price=None, stored=None) -> dict:
+    """Fetch the raw per-symbol inputs of the yield formula.
 
-    Logic:
-      - Get price and trailingEps (TTM)
-      - Estimate next-quarter EPS (from quarterly statements)
-        - fallback to base_q_eps = trailingEps/4 if quarterly data missing
-      - next_year_eps_est = next_q_eps_est * 4
-      - payout_ratio = avg dividend payout ratio from last N years
-      - estimated_dividend = next_year_eps_est * payout_ratio
-      - estimated_yield = estimated_dividend / price
+    Returns {"symbol", "price", "eps_ttm", "div_events", "eps_q", "statement_rows"},
+    where div_events is the compact (days, amounts) pair of dividend_events().
+    Symbols without a usable price or positive trailingEps stop here, without
+    fetching statements or dividends they could never use. Without a
+    `price` (the bulk quote missed the symbol) the quote is read from info,
+    fetched fresh rather than from the day-old cache.
 
-    Returns: (row_dict_or_None, tk)
+    `stored` is StatementStore.fresh_eps(): a symbol in it takes its quarter
+    EPS from there and skips the statement fetch. Otherwise the statement
+    is fetched and its normalized rows returned in statement_rows, for the
+    caller to merge into the store (None = nothing fetched).
     """
-    tk = yf.Ticker(symbol)
+    tk = snapshot if snapshot is not None else SymbolSnapshot(symbol)
 
-    price = get_price(tk)
+    if price is None:
+        tk.refresh("info")
+        price = get_price(tk)
     eps_ttm = get_trailing_eps(tk)
-    dividends = tk.dividends
 
+    record = {"symbol": symbol, "price": price, "eps_ttm": eps_ttm, "div_events": None, "eps_q": None,
+              "statement_rows": None}
     if not price or not eps_ttm or eps_ttm <= 0:
-        return None, tk
+        return record
 
-    # Next-quarter EPS estimate (yfinance-only, from quarterly net income)
-    eps_q_series, next_q_eps_est = estimate_next_quarter_eps_from_quarterly(tk)
+    if stored is not None and symbol in stored:
+        record["eps_q"] = stored[symbol] or None
+    else:
+        rows = statement_rows(tk)
+        record["statement_rows"] = rows
+        record["eps_q"] = [eps for *_, eps in rows] or None
+    record["div_events"] = dividend_events(tk.dividends)
+    return record
 
-    base_q_eps = float(eps_ttm) / 4.0
 
-    # Fallback: if quarterly data missing, use base_q_eps
-    if next_q_eps_est is None:
-        next_q_eps_est = base_q_eps
+def fetched_statements(records) -> dict:
+    """{symbol: statement_rows} of the records that fetched a statement, for StatementStore.merge."""
+    return {r["symbol"]: r["statement_rows"] for r in records if r.get("statement_rows") is not None}
 
-    next_year_eps_est = float(next_q_eps_est) * 4.0
 
-    # payout ratio
-    div_by_year = get_dividend_by_year(dividends)
-    payout = avg_payout_ratio(div_by_year, float(eps_ttm), years_for_payout)
-    if payout is None:
-        return None, tk
+class YieldInputs:
+    """Universe-wide raw inputs, aligned on one symbol index.
+
+    - base:      DataFrame[price, eps_ttm]
+    - dividends: symbol x year matrix of total dividend per share (NaN = no payout that year),
+                 a view of dividend_store.annual (DividendStore)
+    - eps_q:     symbol x quarter matrix of quarterly EPS, most recent first
+
+    Built once from collect_yield_inputs() records; compute_yield_table()
+    can then be re-run for any --years / --threshold without refetching.
+    """
+
+    @metrics.timed("frame_build")
+    def __init__(self, records):
+        records = list(records)
+        symbols = [r["symbol"] for r in records]
+        self.symbols = symbols
+
+        self.base = pd.DataFrame(
+            {
+                "price": [r["price"] for r in records],
+                "eps_ttm": [r["eps_ttm"] for r in records],
+            },
+            index=symbols,
+            dtype=float,
+        )
+        self.dividend_store = DividendStore(symbols, [r.get("div_events") for r in records])
+        self.dividends = self.dividend_store.annual_frame()
+        self.eps_q = pd.DataFrame(
+            [r["eps_q"] or [] for r in records], index=symbols, dtype=float
+        )
+
+    @classmethod
+    def from_frames(cls, base: pd.DataFrame, dividends: pd.DataFrame, eps_q: pd.DataFrame):
+        """Build from already-aligned frames (e.g. loaded from history)."""
+        self = cls.__new__(cls)
+        self.symbols = list(base.index)
+        self.base = base
+        self.dividends = dividends
+        self.eps_q = eps_q
+        self.dividend_store = None
+        return self
+
+    def history_scalars(self, table: pd.DataFrame) -> pd.DataFrame:
+        """Per-symbol raw inputs joined with the computed yield row, for HistoryStore."""
+        scalars = table.set_index("symbol").reindex(self.symbols)
+        scalars["price"] = self.base["price"]
+        scalars["trailing_eps_ttm"] = self.base["eps_ttm"]
+        return scalars
+
+
+YIELD_COLUMNS = [
+    "symbol",
+    "price",
+    "trailing_eps_ttm",
+    "base_q_eps",
+    "next_q_eps_est",
+    "next_year_eps_est",
+    "avg_payout_ratio",
+    "est_dividend",
+    "est_yield_%",
+]
+
+
+def yield_nodes(inputs: YieldInputs, years_for_payout: int, as_of_year=None) -> pd.DataFrame:
+    """Unrounded next_q_eps_est / avg_payout_ratio per symbol (index = inputs.base.index).
+
+    - next_q_eps_est = mean of the 3 most recent quarter EPS, else trailingEps/4
+    - avg_payout_ratio = mean(dividend[y] / trailingEps) over the last N full years
+    """
+    price = inputs.base["price"]
+    eps_ttm = inputs.base["eps_ttm"]
+
+    next_q_eps_est = inputs.eps_q.iloc[:, :3].mean(axis=1).reindex(price.index)
+    next_q_eps_est = next_q_eps_est.fillna(eps_ttm / 4.0)
 
-    est_dividend = float(next_year_eps_est) * float(payout)
-    est_yield = float(est_dividend) / float(price)
+    cur_year = as_of_year or datetime.now().year
+    years = list(range(cur_year - 1, cur_year - 1 - years_for_payout, -1))
+    ratios = inputs.dividends.reindex(columns=years).div(eps_ttm, axis=0)
+    payout = ratios.mean(axis=1).reindex(price.index)
+    return pd.DataFrame({"next_q_eps_est": next_q_eps_est, "avg_payout_ratio": payout})
 
-    row = {
-        "symbol": symbol,
-        "price": round(float(price), 2),
 
-        # historical / baseline
-        "trailing_eps_ttm": round(float(eps_ttm), 2),
-        "base_q_eps": round(float(base_q_eps), 3),
+def payout_basis(years_for_payout: int, as_of_year=None) -> str:
+    """Identity of the payout window ("<as of year>/<years>"); a cached ratio is stale when it differs."""
+    return f"{as_of_year or datetime.now().year}/{years_for_payout}"
 
-        # next-quarter estimate (what your project claims)
-        "next_q_eps_est": round(float(next_q_eps_est), 3),
-        "next_year_eps_est": round(float(next_year_eps_est), 2),
 
-        # payout + yield
-        "avg_payout_ratio": round(float(payout), 3),
-        "est_dividend": round(float(est_dividend), 2),
-        "est_yield_%": round(float(est_yield) * 100, 2),
+def _round(values, ndigits: int):
+    """Python round() per element, as estimate_yield_for_symbol rounded its row.
+
+    np.round / Series.round scale by 10**ndigits and round half to even in
+    binary, so they can disagree with round() on ties (1.3625: 1.362 vs 1.363).
+    """
+    return np.array([round(v, ndigits) for v in np.asarray(values, dtype=float).tolist()], dtype=float)
+
+
+def yield_columns(price, eps_ttm, next_q_eps_est, payout) -> dict:
+    """The rest of the formula on aligned float arrays, rounded per YIELD_COLUMNS (minus symbol)
+    with Python round():
+
+      - est_dividend = next_q_eps_est * 4 * avg_payout_ratio
+      - est_yield = est_dividend / price
+    """
+    price, eps_ttm, next_q_eps_est, payout = (
+        np.asarray(v, dtype=float) for v in (price, eps_ttm, next_q_eps_est, payout)
+    )
+    next_year_eps_est = next_q_eps_est * 4.0
+    est_dividend = next_year_eps_est * payout
+    with np.errstate(invalid="ignore", divide="ignore"):
+        est_yield = est_dividend / price
+    return {
+        "price": _round(price, 2),
+        "trailing_eps_ttm": _round(eps_ttm, 2),
+        "base_q_eps": _round(eps_ttm / 4.0, 3),
+        "next_q_eps_est": _round(next_q_eps_est, 3),
+        "next_year_eps_est": _round(next_year_eps_est, 2),
+        "avg_payout_ratio": _round(payout, 3),
+        "est_dividend": _round(est_dividend, 2),
+        "est_yield_%": _round(est_yield * 100, 2),
     }
 
-    return row, tk
 
+def yield_rows(price: pd.Series, eps_ttm: pd.Series, next_q_eps_est: pd.Series, payout: pd.Series) -> pd.DataFrame:
+    """yield_columns() as a YIELD_COLUMNS table on price's index (every row, valid or not)."""
+    return pd.DataFrame(
+        {"symbol": price.index, **yield_columns(price, eps_ttm, next_q_eps_est, payout)},
+        columns=YIELD_COLUMNS,
+    )
 
-def yield_mode(symbols, years_for_payout, yield_threshold):
-    rows = []
-    for sym in symbols:
-        try:
-            row, _tk = estimate_yield_for_symbol(sym, years_for_payout, trigger_reasons=None)
-            if row is not None:
-                rows.append(row)
-        except Exception as e:
-            print(f"[WARN] {sym}: {e}")
 
-    df_all = pd.DataFrame(rows)
+def skip_reason(record: dict, row) -> str:
+    """compute_yield_table's skip reason for a record whose yield row is `row` ("" = not skipped)."""
+    if row is not None:
+        return ""
+    price = record.get("price")
+    if price is None or pd.isna(price) or price == 0:
+        return "missing_price"
+    eps_ttm = record.get("eps_ttm")
+    if eps_ttm is None or not eps_ttm > 0:
+        return "non_positive_eps"
+    return "no_payout_history"
+
+
+def count_skips(reason: pd.Series):
+    """Count computed ("") and skipped rows by reason in metrics; skipped symbols are noted too."""
+    metrics.count("yield_rows", int((reason == "").sum()), outcome="computed")
+    for why, syms in reason[reason != ""].groupby(reason).groups.items():
+        metrics.count("yield_skipped", len(syms), reason=why)
+        for sym in syms:
+            metrics.note_symbol(sym, skip_reason=why)
+
+
+@metrics.timed("compute_yield")
+def compute_yield_table(inputs: YieldInputs, years_for_payout: int, as_of_year=None,
+                        record_skips=True, scenarios=None) -> pd.DataFrame:
+    """Vectorized estimate_yield_for_symbol over the whole universe.
+
+    Same formula, as column operations: yield_nodes() then yield_rows().
+
+    `scenarios` (labels or estimator names, see estimators.py) add a
+    next_q_eps_<label> / est_yield_%_<label> column pair each, estimated
+    from the same eps_q matrix in one pass; same trailingEps/4 fallback.
+
+    Rows without price, positive trailingEps or payout history are dropped;
+    with record_skips the first failing condition is counted per symbol in
+    metrics ("yield_skipped" by reason).
+    Returns rows in input symbol order, with the YIELD_COLUMNS layout.
+    """
+    price = inputs.base["price"]
+    eps_ttm = inputs.base["eps_ttm"]
+    nodes = yield_nodes(inputs, years_for_payout, as_of_year)
+    base_q_eps = eps_ttm / 4.0
+    payout = nodes["avg_payout_ratio"]
+
+    has_price = price.notna() & (price != 0)
+    has_eps = eps_ttm > 0
+    valid = has_price & has_eps & payout.notna()
+    if record_skips:
+        count_skips(pd.Series(
+            np.select([~has_price, ~has_eps, payout.isna()], ["missing_price", "non_positive_eps", "no_payout_history"], ""),
+            index=price.index,
+        ))
+
+    table = yield_rows(price, eps_ttm, nodes["next_q_eps_est"], payout)
+    if scenarios:
+        with metrics.timed("eps_scenarios"):
+            est = estimate_eps(inputs.eps_q.reindex(price.index), scenarios)
+            for label in est.columns:
+                eps_s = est[label].fillna(base_q_eps)
+                table[f"next_q_eps_{label}"] = _round(eps_s, 3)
+                table[f"est_yield_%_{label}"] = _round(eps_s * 4.0 * payout / price * 100, 2)
+    return table[valid.values].reset_index(drop=True)
+
+
+def estimate_yield_for_symbol(symbol: str, years_for_payout: int, trigger_reasons=None, snapshot=None,
+                              price=None):
+    """Compute estimated yield based on Next-Q EPS estimate.
+
+    Logic:
+      - Get price and trailingEps (TTM)
+      - Estimate next-quarter EPS (from quarterly statements)
+        - fallback to base_q_eps = trailingEps/4 if quarterly data missing
+      - next_year_eps_est = next_q_eps_est * 4
+      - payout_ratio = avg dividend payout ratio from last N years
+      - estimated_dividend = next_year_eps_est * payout_ratio
+      - estimated_yield = estimated_dividend / price
+
+    Pass `snapshot` (a SymbolSnapshot) to reuse payloads already fetched,
+    e.g. by event_mode's trigger scan, and `price` from get_prices_bulk to
+    skip reading the quote from tk.info.
+
+    Returns: (row_dict_or_None, snapshot)
+    """
+    tk = snapshot if snapshot is not None else SymbolSnapshot(symbol)
+
+    record = collect_yield_inputs(symbol, snapshot=tk, price=price)
+    table = compute_yield_table(YieldInputs([record]), years_for_payout)
+    if table.empty:
+        return None, tk
+
+    return table.iloc[0].to_dict(), tk
+
+
+def yield_mode(symbols, years_for_payout, yield_threshold, workers=None, timeout=None, retries=None,
+               inputs=None, checkpoint=False, resume=False, scenarios=None):
+    """Compute yields for all symbols and write rows >= threshold to CSV.
+
+    Pass `inputs` (a YieldInputs from an earlier run) to re-screen at a
+    different years / threshold in memory, without any fetching.
+
+    With checkpoint=True every fetched record is checkpointed as it
+    completes; resume=True reuses the records of an interrupted run over
+    the same symbols and only fetches the rest.
+    """
+    ckpt = None
+    if inputs is None:
+        symbols = list(symbols)
+        ckpt = Checkpoint("yield", symbols) if checkpoint or resume else None
+        done = ckpt.start(resume) if ckpt else {}
+        todo = [sym for sym in symbols if sym not in done]
+
+        covered = set()
+        prices = get_prices_bulk(todo, covered=covered)
+        record_quotes(covered, prices)
+        statements = StatementStore()
+        stored = statements.fresh_eps(todo)
+
+        def fetch(sym):
+            return collect_yield_inputs(sym, price=prices.get(sym), stored=stored)
+
+        def on_result(sym, record, err):
+            if err is None:
+                ckpt.add(sym, record)
+
+        try:
+            fetched = map_symbols(fetch, todo, workers=workers, timeout=timeout, retries=retries,
+                                  on_result=on_result if ckpt else None)
+            outcomes = {sym: (record, err) for sym, record, err in fetched}
+            records = []
+            for sym in symbols:
+                if sym in done:
+                    records.append(done[sym])
+                    continue
+                record, err = outcomes[sym]
+                if err is not None:
+                    print(f"[WARN] {sym}: {err}")
+                else:
+                    records.append(record)
+            statements.merge(fetched_statements(records))
+        finally:
+            statements.close()
+            if ckpt:
+                ckpt.flush()
+        inputs = YieldInputs(records)
+        df_all = compute_yield_table(inputs, years_for_payout, scenarios=scenarios)
+        HistoryStore().append("yield", inputs.symbols, scalars=inputs.history_scalars(df_all), inputs=inputs)
+    else:
+        df_all = compute_yield_table(inputs, years_for_payout, scenarios=scenarios)
 
     if not df_all.empty:
         df_all = df_all.sort_values("est_yield_%", ascending=False)
 
-    df_high = df_all[df_all["est_yield_%"] >= 6]
+    threshold_pct = float(yield_threshold) * 100.0
+    df_high = df_all[df_all["est_yield_%"] >= threshold_pct]
 
     if not df_high.empty:
-        filename = "result/high_yield.csv"
-        df_high.to_csv(filename, index=False)
+        config.RESULT_DIR.mkdir(parents=True, exist_ok=True)
+        filename = config.RESULT_DIR / "high_yield.csv"
+        with metrics.timed("to_csv"):
+            df_high.to_csv(filename, index=False)
         print(f"輸出完成: {filename}")
     else:
-        print("沒有大於6%的股票")
-    return df_all, df_high
\ No newline at end of file
+        print(f"沒有大於{threshold_pct:g}%的股票")
+    if ckpt:
+        ckpt.discard()
+    return df_all, df_high
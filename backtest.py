@@ -0,0 +1,202 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+from fetch_engine import map_symbols
+from data_fetcher import SymbolSnapshot, get_history_bulk
+
+
+def point_in_time_eps(quarterly_eps: pd.DataFrame, dates, report_lag_days=None):
+    """TTM EPS and next-quarter EPS estimate as known on each date.
+
+    quarterly_eps: quarter_end x symbol matrix of quarter EPS.
+    A quarter only counts once quarter_end + report_lag_days has passed, so
+    a rebalance never sees results that were not yet published.
+
+    Returns (eps_ttm, next_q_eps_est) as date x symbol matrices:
+      - eps_ttm = sum of the 4 most recent published quarters
+      - next_q_eps_est = mean of the 3 most recent published quarters
+        (same rule as estimate_next_quarter_eps_from_quarterly)
+    """
+    lag = pd.Timedelta(days=config.REPORT_LAG_DAYS if report_lag_days is None else report_lag_days)
+    dates = pd.DatetimeIndex(dates)
+    if quarterly_eps.empty:
+        empty = pd.DataFrame(np.nan, index=dates, columns=quarterly_eps.columns)
+        return empty, empty.copy()
+
+    q = quarterly_eps.sort_index()
+    eps_ttm = q.rolling(4, min_periods=4).sum()
+    next_q = q.rolling(3, min_periods=1).mean()
+
+    published = q.index + lag
+    eps_ttm.index = published
+    next_q.index = published
+    return (
+        eps_ttm.reindex(dates, method="ffill"),
+        next_q.reindex(dates, method="ffill"),
+    )
+
+
+def trailing_avg_dividend(dividends: pd.DataFrame, dates, years_for_payout: int):
+    """Average annual dividend over the N full calendar years before each date.
+
+    Years with no payout are skipped, as in avg_payout_ratio. Returns a
+    date x symbol matrix.
+    """
+    dates = pd.DatetimeIndex(dates)
+    annual = dividends.groupby(dividends.index.year).sum()
+    annual = annual.where(annual > 0)
+    if annual.empty:
+        return pd.DataFrame(np.nan, index=dates, columns=dividends.columns)
+
+    years = range(int(annual.index.min()), int(dates.year.max()) + 1)
+    annual = annual.reindex(years)
+    # row Y holds the mean of years Y-N .. Y-1
+    avg = annual.rolling(years_for_payout, min_periods=1).mean().shift(1)
+    out = avg.reindex(dates.year)
+    out.index = dates
+    return out
+
+
+def run_backtest(close: pd.DataFrame, dividends: pd.DataFrame, quarterly_eps: pd.DataFrame,
+                 years_for_payout: int, yield_threshold: float, freq=None, start=None,
+                 report_lag_days=None):
+    """Vectorized point-in-time replay of the yield screen.
+
+    Inputs are date x symbol matrices (close, dividends per share on ex-date)
+    and a quarter_end x symbol matrix of quarterly EPS. On each rebalance
+    date the screen is recomputed with only the data available then:
+      est_dividend = next_q_eps_est * 4 * avg_dividend / eps_ttm
+      est_yield    = est_dividend / price
+    Names with est_yield >= yield_threshold are held equal-weight until the
+    next rebalance; period returns include dividends paid in between.
+
+    Returns (periods, summary): a per-rebalance DataFrame and a dict of
+    aggregate statistics.
+    """
+    freq = freq or config.BACKTEST_FREQ
+    close = close.sort_index().ffill()
+    dividends = dividends.reindex(index=close.index, columns=close.columns).fillna(0.0)
+    quarterly_eps = quarterly_eps.reindex(columns=close.columns)
+
+    px = close.resample(freq).last()
+    paid = dividends.resample(freq).sum()
+    if start is not None:
+        keep = px.index >= pd.Timestamp(start)
+        px, paid = px[keep], paid[keep]
+    dates = px.index
+
+    eps_ttm, next_q = point_in_time_eps(quarterly_eps, dates, report_lag_days)
+    avg_div = trailing_avg_dividend(dividends, dates, years_for_payout)
+
+    # payout = avg_div / eps_ttm, only defined for positive TTM EPS
+    est_dividend = next_q * 4.0 * avg_div / eps_ttm.where(eps_ttm > 0)
+    est_yield = est_dividend / px.where(px > 0)
+
+    selected = est_yield >= float(yield_threshold)
+    n_held = selected.sum(axis=1)
+    weights = selected.div(n_held.replace(0, np.nan), axis=0).fillna(0.0)
+
+    # total return from this rebalance to the next one
+    fwd = (px.shift(-1) + paid.shift(-1)) / px - 1.0
+
+    port_ret = (weights * fwd.fillna(0.0)).sum(axis=1)
+    universe_ret = fwd.mean(axis=1)
+    turnover = (weights - weights.shift(1).fillna(0.0)).abs().sum(axis=1) * 0.5
+    hits = (selected & (fwd > 0)).sum(axis=1)
+
+    periods = pd.DataFrame({
+        "n_held": n_held,
+        "return": port_ret,
+        "universe_return": universe_ret,
+        "turnover": turnover,
+        "hit_rate": hits / n_held.replace(0, np.nan),
+    }).iloc[:-1]  # last rebalance has no forward return yet
+
+    summary = summarize(periods, freq)
+    return periods, summary
+
+
+def summarize(periods: pd.DataFrame, freq=None) -> dict:
+    """Aggregate return, risk, turnover and hit-rate statistics."""
+    if periods.empty:
+        return {"periods": 0}
+
+    per_year = {"ME": 12, "M": 12, "QE": 4, "Q": 4, "W": 52, "YE": 1, "Y": 1}.get(freq or config.BACKTEST_FREQ, 12)
+    ret = periods["return"]
+    equity = (1.0 + ret).cumprod()
+    years = len(ret) / per_year
+    held = periods["n_held"]
+
+    return {
+        "periods": int(len(ret)),
+        "total_return_%": round(float(equity.iloc[-1] - 1.0) * 100, 2),
+        "cagr_%": round(float(equity.iloc[-1] ** (1.0 / years) - 1.0) * 100, 2) if years > 0 else None,
+        "ann_vol_%": round(float(ret.std() * np.sqrt(per_year)) * 100, 2),
+        "max_drawdown_%": round(float((equity / equity.cummax() - 1.0).min()) * 100, 2),
+        "universe_total_return_%": round(float((1.0 + periods["universe_return"].fillna(0.0)).prod() - 1.0) * 100, 2),
+        "avg_turnover": round(float(periods["turnover"].mean()), 3),
+        "hit_rate": round(float((periods["hit_rate"] * held).sum() / held.sum()), 3) if held.sum() else None,
+        "avg_holdings": round(float(held.mean()), 1),
+    }
+
+
+def load_quarterly_eps(symbols, workers=None, timeout=None, retries=None) -> pd.DataFrame:
+    """quarter_end x symbol EPS matrix from the stored quarterly statements.
+
+    Symbols whose statement is due (StatementStore.due) are fetched and
+    merged into the store first.
+    """
+    from statements import StatementStore, statement_rows
+
+    store = StatementStore()
+    try:
+        fetched = {}
+        due = store.due(symbols)
+        for sym, rows, err in map_symbols(lambda s: statement_rows(SymbolSnapshot(s)), due,
+                                          workers=workers, timeout=timeout, retries=retries):
+            if err is not None:
+                print(f"[WARN] {sym}: {err}")
+            else:
+                fetched[sym] = rows
+        store.merge(fetched)
+        eps = store.eps_frame(symbols)
+    finally:
+        store.close()
+    if eps.empty:
+        return pd.DataFrame(columns=list(symbols))
+    # align fiscal quarter ends (e.g. 03-30 vs 03-31) on calendar quarters
+    quarter = eps.index.to_period("Q").to_timestamp(how="end").normalize()
+    return eps.groupby(quarter).last()
+
+
+def backtest_mode(symbols, years_for_payout, yield_threshold, start=None, end=None, freq=None,
+                  workers=None, timeout=None, retries=None):
+    """Backtest the yield screen over [start, end] and write per-period results."""
+    start = pd.Timestamp(start) if start else pd.Timestamp.now().normalize() - pd.DateOffset(years=config.BACKTEST_YEARS)
+    # load N extra years so the first rebalance already has payout history
+    data_start = start - pd.DateOffset(years=years_for_payout + 1)
+
+    close, dividends = get_history_bulk(symbols, data_start, end)
+    if close.empty:
+        print("(no price history available)")
+        return pd.DataFrame(), {"periods": 0}
+    quarterly_eps = load_quarterly_eps(list(close.columns), workers=workers, timeout=timeout, retries=retries)
+
+    periods, summary = run_backtest(
+        close, dividends, quarterly_eps, years_for_payout, yield_threshold, freq=freq, start=start
+    )
+
+    print(f"\n=== Backtest ({start.date()} ~ {close.index[-1].date()}, >= {yield_threshold * 100:g}%) ===")
+    for k, v in summary.items():
+        print(f"- {k}: {v}")
+
+    if not periods.empty:
+        config.RESULT_DIR.mkdir(exist_ok=True)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path = config.RESULT_DIR / f"backtest_{int(yield_threshold * 100)}pct_{ts}.csv"
+        periods.to_csv(out_path, index_label="date")
+        print(f"\n輸出完成: {out_path}")
+    return periods, summary
@@ -0,0 +1,193 @@
+"""Benchmark the screening pipeline on synthetic or recorded universes.
+
+Examples:
+  python bench.py                                  # synthetic, 100/500/2000/10000 symbols
+  python bench.py --sizes 500 --latency 0.02       # simulate Yahoo round-trips
+  python bench.py --source replay --fixtures fixtures --out bench.jsonl
+  python bench.py --startup                        # CLI cold-start times vs STARTUP_TARGET_MS
+
+Each (mode, size) run prints one JSON line with throughput, per-stage
+latency percentiles (metrics.timed stages) and peak traced memory.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import config
+import data_fetcher
+import metrics
+from data_sources import FixtureStore, make_source
+
+
+DEFAULT_SIZES = [100, 500, 2000, 10000]
+
+# cold start of `python main.py --help` (interpreter included) should stay under this
+STARTUP_TARGET_MS = 150
+STARTUP_COMMANDS = {
+    "help": ["main.py", "--help"],
+    "import_main": ["-c", "import main"],
+    # what a real run pays once it reaches the pipeline, for reference (no target)
+    "import_pipeline": ["-c", "import main, analyzer, trigger_engine"],
+}
+
+
+def universe(source_kind: str, size: int, fixtures=None):
+    if source_kind == "replay":
+        recorded = sorted(p.stem for p in (FixtureStore(fixtures).root / "info").glob("*.pkl"))
+        return recorded[:size]
+    return [f"B{i:05d}.TW" for i in range(size)]
+
+
+@contextlib.contextmanager
+def sandbox():
+    """Point result/state/history paths at a throwaway directory."""
+    saved = {k: getattr(config, k) for k in ("RESULT_DIR", "STATE_DB", "STATE_FILE", "HISTORY_DIR", "UNIVERSE_DB",
+                                         "STATEMENT_DB")}
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        tmp = Path(tmp)
+        config.RESULT_DIR = tmp / "result"
+        config.RESULT_DIR.mkdir()
+        config.STATE_DB = tmp / "state.db"
+        config.STATE_FILE = tmp / "state.json"
+        config.HISTORY_DIR = tmp / "history"
+        config.UNIVERSE_DB = tmp / "universe.db"
+        config.STATEMENT_DB = tmp / "statements.db"
+        try:
+            yield tmp
+        finally:
+            for k, v in saved.items():
+                setattr(config, k, v)
+
+
+def run_once(label, fn, symbols, trace_memory=True) -> dict:
+    metrics.reset()
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(symbols)
+    wall = time.perf_counter() - t0
+    peak = None
+    if trace_memory:
+        _cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "mode": label,
+        "symbols": len(symbols),
+        "wall_s": round(wall, 4),
+        "symbols_per_s": round(len(symbols) / wall, 1) if wall > 0 else None,
+        "peak_mem_mb": round(peak / 2**20, 2) if peak is not None else None,
+        "stages": metrics.stage_summary(),
+        "counters": metrics.counter_summary(),
+    }
+
+
+def bench(sizes, modes, source_kind="synthetic", fixtures=None, latency=0.0, workers=None,
+          years=None, threshold=None, trace_memory=True):
+    from analyzer import yield_mode
+    from trigger_engine import event_mode
+
+    years = years or config.YEARS_FOR_PAYOUT
+    threshold = threshold or config.YIELD_THRESHOLD
+    data_fetcher.set_source(make_source(source_kind, fixtures, latency=latency))
+    data_fetcher.set_cache(None)
+
+    runners = {
+        "yield": lambda syms: yield_mode(syms, years, threshold, workers=workers),
+        # first event run: empty state, every symbol triggers
+        "event": lambda syms: event_mode(syms, years, threshold, workers=workers),
+    }
+
+    for size in sizes:
+        symbols = universe(source_kind, size, fixtures)
+        if not symbols:
+            continue
+        with sandbox():
+            for mode in modes:
+                result = run_once(mode, runners[mode], symbols, trace_memory)
+                yield result
+                if mode == "event":
+                    # second run over the saved state: the quiet-night path
+                    yield run_once("event_quiet", runners["event"], symbols, trace_memory)
+
+
+def startup_bench(repeat=5):
+    """Wall time of fresh interpreter processes, one result per STARTUP_COMMANDS entry."""
+    root = Path(__file__).resolve().parent
+    for label, argv in STARTUP_COMMANDS.items():
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, *argv], cwd=root, stdout=subprocess.DEVNULL, check=True)
+            times.append((time.perf_counter() - t0) * 1000.0)
+        result = {
+            "mode": f"startup_{label}",
+            "runs": repeat,
+            "min_ms": round(min(times), 1),
+            "median_ms": round(statistics.median(times), 1),
+        }
+        if label != "import_pipeline":
+            result["target_ms"] = STARTUP_TARGET_MS
+            result["ok"] = result["median_ms"] <= STARTUP_TARGET_MS
+        yield result
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark yield_mode / event_mode with per-stage timings.")
+    p.add_argument("--sizes", type=str, default=",".join(map(str, DEFAULT_SIZES)), help="Universe sizes, comma-separated")
+    p.add_argument("--modes", type=str, default="yield,event", help="Modes to run: yield,event")
+    p.add_argument("--source", choices=["synthetic", "replay"], default="synthetic")
+    p.add_argument("--fixtures", type=str, default=str(config.FIXTURES_DIR), help="(replay) recorded fixtures")
+    p.add_argument("--latency", type=float, default=0.0, help="Simulated latency per fetch, seconds")
+    p.add_argument("--workers", type=int, default=config.FETCH_WORKERS)
+    p.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, no peak memory)")
+    p.add_argument("--startup", action="store_true", help="Only measure CLI cold-start time")
+    p.add_argument("--repeat", type=int, default=5, help="(startup) processes per command")
+    p.add_argument("--out", type=str, default="", help="Append JSON lines to this file as well as stdout")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    meta = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "source": args.source,
+        "latency": args.latency,
+        "workers": args.workers,
+    }
+    out = open(args.out, "a", encoding="utf-8") if args.out else None
+    try:
+        if args.startup:
+            results = startup_bench(args.repeat)
+        else:
+            results = bench(sizes, modes, args.source, args.fixtures, args.latency, args.workers,
+                            trace_memory=not args.no_memory)
+        for result in results:
+            line = json.dumps({**meta, **result}, ensure_ascii=False)
+            print(line)
+            sys.stdout.flush()
+            if out:
+                out.write(line + "\n")
+                out.flush()
+    finally:
+        if out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+import config
+
+
+class Checkpoint:
+    """Append-only log of finished per-symbol work for one run.
+
+    Entries are (symbol, payload) pairs pickled one after another into
+    checkpoints/<mode>_<run key>.ckpt. They are buffered and flushed every
+    CHECKPOINT_EVERY entries or CHECKPOINT_SECONDS seconds, so a killed run
+    loses at most that much work. load() stops at a truncated tail (the
+    entry being written when the process died). The run key is a hash of
+    the mode, the symbol list and any extra identity (e.g. --force-all), so
+    --resume never picks up another run's checkpoint.
+    """
+
+    def __init__(self, mode: str, symbols, extra=(), root=None, every=None, seconds=None):
+        key = hashlib.sha1(
+            "\n".join([mode, *map(str, extra), *sorted(dict.fromkeys(symbols))]).encode("utf-8")
+        ).hexdigest()[:12]
+        self.root = Path(root if root is not None else config.CHECKPOINT_DIR)
+        self.path = self.root / f"{mode}_{key}.ckpt"
+        self.every = config.CHECKPOINT_EVERY if every is None else every
+        self.seconds = config.CHECKPOINT_SECONDS if seconds is None else seconds
+        self._lock = threading.Lock()
+        self._pending = []
+        self._flushed_at = time.monotonic()
+
+    def load(self) -> dict:
+        """{symbol: payload} of everything checkpointed so far (later entries win)."""
+        done = {}
+        try:
+            f = self.path.open("rb")
+        except FileNotFoundError:
+            return done
+        with f:
+            while True:
+                try:
+                    sym, payload = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    print(f"[CHECKPOINT] {self.path}: ignoring truncated tail after {len(done)} symbols")
+                    break
+                done[sym] = payload
+        return done
+
+    def start(self, resume: bool) -> dict:
+        """Begin the run: the finished work to skip when resuming, else {} (and a fresh file)."""
+        if resume:
+            done = self.load()
+            if done:
+                print(f"[CHECKPOINT] resuming: {len(done)} symbols already done ({self.path})")
+            return done
+        self.discard()
+        return {}
+
+    def add(self, symbol: str, payload):
+        with self._lock:
+            self._pending.append((symbol, payload))
+            due = len(self._pending) >= self.every or time.monotonic() - self._flushed_at >= self.seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._flushed_at = time.monotonic()
+            if not pending:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with self.path.open("ab") as f:
+                for entry in pending:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def discard(self):
+        """Drop the checkpoint once the run's results are safely written."""
+        with self._lock:
+            self._pending = []
+        self.path.unlink(missing_ok=True)
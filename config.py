@@ -1,548 +1,96 @@
 from pathlib import Path
 
-# 500 檔台股清單 (節錄自原代碼)
-SYMBOLS = [
-    "1101.TW",  # 台泥
-    "1102.TW",  # 亞泥
-    "1103.TW",  # 嘉泥
-    "1104.TW",  # 環泥
-    "1108.TW",  # 幸福
-    "1109.TW",  # 信大
-    "1110.TW",  # 東泥
-    "1201.TW",  # 味全
-    "1203.TW",  # 味王
-    "1210.TW",  # 大成
-    "1213.TW",  # 大飲
-    "1215.TW",  # 卜蜂
-    "1216.TW",  # 統一
-    "1217.TW",  # 愛之味
-    "1218.TW",  # 泰山
-    "1219.TW",  # 福壽
-    "1220.TW",  # 台榮
-    "1225.TW",  # 福懋油
-    "1227.TW",  # 佳格
-    "1229.TW",  # 聯華
-    "1231.TW",  # 聯華食
-    "1232.TW",  # 大統益
-    "1233.TW",  # 天仁
-    "1234.TW",  # 黑松
-    "1235.TW",  # 興泰
-    "1236.TW",  # 宏亞
-    "1256.TW",  # 鮮活果汁-KY
-    "1301.TW",  # 台塑
-    "1303.TW",  # 南亞
-    "1304.TW",  # 台聚
-    "1305.TW",  # 華夏
-    "1307.TW",  # 三芳
-    "1308.TW",  # 亞聚
-    "1309.TW",  # 台達化
-    "1310.TW",  # 台苯
-    "1312.TW",  # 國喬
-    "1313.TW",  # 聯成
-    "1314.TW",  # 中石化
-    "1315.TW",  # 達新
-    "1316.TW",  # 上曜
-    "1319.TW",  # 東陽
-    "1321.TW",  # 大洋
-    "1323.TW",  # 永裕
-    "1324.TW",  # 地球
-    "1325.TW",  # 恆大
-    "1326.TW",  # 台化
-    "1337.TW",  # 再生-KY
-    "1338.TW",  # 廣華-KY
-    "1339.TW",  # 昭輝
-    "1340.TW",  # 勝悅-KY
-    "1341.TW",  # 富林-KY
-    "1342.TW",  # 八貫
-    "1402.TW",  # 遠東新
-    "1409.TW",  # 新纖
-    "1410.TW",  # 南染
-    "1413.TW",  # 宏洲
-    "1414.TW",  # 東和
-    "1416.TW",  # 廣豐
-    "1417.TW",  # 嘉裕
-    "1418.TW",  # 東華
-    "1419.TW",  # 新紡
-    "1423.TW",  # 利華
-    "1432.TW",  # 大魯閣
-    "1434.TW",  # 福懋
-    "1435.TW",  # 中福
-    "1436.TW",  # 華友聯
-    "1437.TW",  # 勤益控
-    "1438.TW",  # 三發地產
-    "1439.TW",  # 雋揚
-    "1440.TW",  # 南紡
-    "1441.TW",  # 大東
-    "1442.TW",  # 名軒
-    "1443.TW",  # 立益
-    "1444.TW",  # 力麗
-    "1445.TW",  # 大宇
-    "1446.TW",  # 宏和
-    "1447.TW",  # 力鵬
-    "1449.TW",  # 佳和
-    "1451.TW",  # 本盟
-    "1452.TW",  # 宏益
-    "1453.TW",  # 大將
-    "1454.TW",  # 台富
-    "1455.TW",  # 集盛
-    "1456.TW",  # 怡華
-    "1457.TW",  # 宜進
-    "1459.TW",  # 聯發
-    "1460.TW",  # 宏遠
-    "1463.TW",  # 強盛
-    "1464.TW",  # 得力
-    "1465.TW",  # 偉全
-    "1466.TW",  # 聚隆
-    "1467.TW",  # 南緯
-    "1468.TW",  # 昶和
-    "1470.TW",  # 大統新創
-    "1471.TW",  # 首利
-    "1472.TW",  # 三洋實業
-    "1473.TW",  # 台南
-    "1474.TW",  # 弘裕
-    "1475.TW",  # 業旺
-    "1476.TW",  # 聚陽
-    "1477.TW",  # 聚大
-    "1503.TW",  # 士電
-    "1504.TW",  # 東元
-    "1506.TW",  # 正道
-    "1512.TW",  # 瑞利
-    "1513.TW",  # 中興電
-    "1514.TW",  # 亞力
-    "1515.TW",  # 力山
-    "1516.TW",  # 川飛
-    "1517.TW",  # 利奇
-    "1519.TW",  # 華城
-    "1521.TW",  # 大經
-    "1522.TW",  # 堤維西
-    "1524.TW",  # 耿鼎
-    "1525.TW",  # 江申
-    "1526.TW",  # 日馳
-    "1527.TW",  # 鑽全
-    "1528.TW",  # 恩德
-    "1529.TW",  # 樂士
-    "1530.TW",  # 亞崴
-    "1531.TW",  # 高林股
-    "1532.TW",  # 勤美
-    "1533.TW",  # 車王電
-    "1535.TW",  # 中宇
-    "1536.TW",  # 和大
-    "1537.TW",  # 廣隆
-    "1538.TW",  # 正峰
-    "1539.TW",  # 巨庭
-    "1540.TW",  # 喬福
-    "1541.TW",  # 錩泰
-    "1558.TW",  # 伸興
-    "1560.TW",  # 中砂
-    "1568.TW",  # 倉佑
-    "1582.TW",  # 信錦
-    "1583.TW",  # 程泰
-    "1587.TW",  # 吉茂
-    "1589.TW",  # 永冠-KY
-    "1590.TW",  # 亞德客-KY
-    "1597.TW",  # 直得
-    "1598.TW",  # 岱宇
-    "1603.TW",  # 華電
-    "1604.TW",  # 聲寶
-    "1605.TW",  # 華新
-    "1608.TW",  # 華榮
-    "1609.TW",  # 大亞
-    "1611.TW",  # 中電
-    "1612.TW",  # 宏泰
-    "1614.TW",  # 三洋電
-    "1615.TW",  # 大山
-    "1616.TW",  # 億泰
-    "1617.TW",  # 榮星
-    "1618.TW",  # 合機
-    "1626.TW",  # 艾美特-KY
-    "1702.TW",  # 南僑
-    "1707.TW",  # 葡萄王
-    "1708.TW",  # 東鹼
-    "1709.TW",  # 和益
-    "1710.TW",  # 東聯
-    "1711.TW",  # 永光
-    "1712.TW",  # 興農
-    "1713.TW",  # 國化
-    "1714.TW",  # 和桐
-    "1717.TW",  # 長興
-    "1718.TW",  # 中纖
-    "1720.TW",  # 生達
-    "1721.TW",  # 三晃
-    "1722.TW",  # 台肥
-    "1723.TW",  # 中碳
-    "1725.TW",  # 元禎
-    "1726.TW",  # 永記
-    "1727.TW",  # 中華化
-    "1730.TW",  # 花仙子
-    "1731.TW",  # 美吾華
-    "1732.TW",  # 毛寶
-    "1733.TW",  # 五鼎
-    "1734.TW",  # 杏輝
-    "1735.TW",  # 日勝化
-    "1736.TW",  # 喬山
-    "1737.TW",  # 臺鹽
-    "1760.TW",  # 寶齡富錦
-    "1762.TW",  # 中化生
-    "1773.TW",  # 勝一
-    "1776.TW",  # 展宇
-    "1783.TW",  # 和康生
-    "1786.TW",  # 財團法人
-    "1789.TW",  # 神隆
-    "1795.TW",  # 美時
-    "1802.TW",  # 台玻
-    "1805.TW",  # 寶徠
-    "1806.TW",  # 冠軍
-    "1808.TW",  # 潤隆
-    "1809.TW",  # 中釉
-    "1810.TW",  # 和成
-    "1817.TW",  # 凱撒衛
-    "1903.TW",  # 士紙
-    "1904.TW",  # 正隆
-    "1905.TW",  # 華紙
-    "1906.TW",  # 寶隆
-    "1907.TW",  # 永豐餘
-    "1909.TW",  # 榮成
-    "2002.TW",  # 中鋼
-    "2006.TW",  # 東鋼
-    "2007.TW",  # 燁興
-    "2008.TW",  # 高興昌
-    "2009.TW",  # 第一銅
-    "2010.TW",  # 春源
-    "2012.TW",  # 春雨
-    "2013.TW",  # 中鋼構
-    "2014.TW",  # 中鴻
-    "2015.TW",  # 豐興
-    "2017.TW",  # 官田鋼
-    "2020.TW",  # 美亞
-    "2022.TW",  # 聚亨
-    "2023.TW",  # 燁輝
-    "2024.TW",  # 志聯
-    "2025.TW",  # 千興
-    "2027.TW",  # 大成鋼
-    "2028.TW",  # 威致
-    "2029.TW",  # 盛餘
-    "2030.TW",  # 彰源
-    "2031.TW",  # 新光鋼
-    "2032.TW",  # 新鋼
-    "2033.TW",  # 佳源
-    "2034.TW",  # 允強
-    "2038.TW",  # 海光
-    "2049.TW",  # 上銀
-    "2059.TW",  # 川湖
-    "2062.TW",  # 橋椿
-    "2101.TW",  # 南港
-    "2102.TW",  # 泰豐
-    "2103.TW",  # 台橡
-    "2104.TW",  # 中橡
-    "2105.TW",  # 正新
-    "2106.TW",  # 建大
-    "2107.TW",  # 厚生
-    "2108.TW",  # 南帝
-    "2109.TW",  # 華豐
-    "2114.TW",  # 鑫永銓
-    "2115.TW",  # 六暉-KY
-    "2201.TW",  # 裕隆
-    "2204.TW",  # 中華
-    "2206.TW",  # 三陽工業
-    "2207.TW",  # 和泰車
-    "2208.TW",  # 台船
-    "2211.TW",  # 長榮鋼
-    "2227.TW",  # 裕日車
-    "2228.TW",  # 劍麟
-    "2231.TW",  # 為升
-    "2233.TW",  # 宇隆
-    "2236.TW",  # 百達-KY
-    "2239.TW",  # 英利-KY
-    "2243.TW",  # 宏旭-KY
-    "2247.TW",  # 汎德永業
-    "2301.TW",  # 光寶科
-    "2302.TW",  # 麗正
-    "2303.TW",  # 聯電
-    "2305.TW",  # 全友
-    "2308.TW",  # 台達電
-    "2312.TW",  # 金寶
-    "2313.TW",  # 華通
-    "2314.TW",  # 台揚
-    "2316.TW",  # 楠梓電
-    "2317.TW",  # 鴻海
-    "2321.TW",  # 東訊
-    "2323.TW",  # 中環
-    "2324.TW",  # 仁寶
-    "2327.TW",  # 國巨
-    "2328.TW",  # 廣宇
-    "2329.TW",  # 華泰
-    "2330.TW",  # 台積電
-    "2331.TW",  # 精英
-    "2332.TW",  # 友訊
-    "2337.TW",  # 旺宏
-    "2338.TW",  # 光罩
-    "2340.TW",  # 台亞
-    "2342.TW",  # 茂矽
-    "2344.TW",  # 華邦電
-    "2345.TW",  # 智邦
-    "2347.TW",  # 聯強
-    "2348.TW",  # 海悅
-    "2349.TW",  # 錸德
-    "2351.TW",  # 順德
-    "2352.TW",  # 佳世達
-    "2353.TW",  # 宏碁
-    "2354.TW",  # 鴻準
-    "2355.TW",  # 敬鵬
-    "2356.TW",  # 英業達
-    "2357.TW",  # 華碩
-    "2358.TW",  # 廷鑫
-    "2359.TW",  # 所羅門
-    "2360.TW",  # 致茂
-    "2362.TW",  # 藍天
-    "2363.TW",  # 矽統
-    "2364.TW",  # 倫飛
-    "2365.TW",  # 昆盈
-    "2367.TW",  # 燿華
-    "2368.TW",  # 金像電
-    "2369.TW",  # 菱生
-    "2371.TW",  # 大同
-    "2373.TW",  # 震旦行
-    "2374.TW",  # 佳能
-    "2375.TW",  # 凱美
-    "2376.TW",  # 技嘉
-    "2377.TW",  # 微星
-    "2379.TW",  # 瑞昱
-    "2380.TW",  # 虹光
-    "2382.TW",  # 廣達
-    "2383.TW",  # 台光電
-    "2385.TW",  # 群光
-    "2387.TW",  # 精元
-    "2388.TW",  # 威盛
-    "2390.TW",  # 云辰
-    "2392.TW",  # 正崴
-    "2393.TW",  # 億光
-    "2395.TW",  # 研華
-    "2397.TW",  # 友通
-    "2399.TW",  # 映泰
-    "2401.TW",  # 凌陽
-    "2402.TW",  # 毅嘉
-    "2404.TW",  # 漢唐
-    "2405.TW",  # 輔信
-    "2406.TW",  # 國碩
-    "2408.TW",  # 南亞科
-    "2409.TW",  # 群創
-    "2412.TW",  # 中華電
-    "2413.TW",  # 環科
-    "2414.TW",  # 精技
-    "2415.TW",  # 錩新
-    "2417.TW",  # 圓剛
-    "2419.TW",  # 仲琦
-    "2420.TW",  # 毅金
-    "2421.TW",  # 建準
-    "2423.TW",  # 固緯
-    "2424.TW",  # 隴華
-    "2425.TW",  # 承啟
-    "2426.TW",  # 鼎元
-    "2427.TW",  # 三商電
-    "2428.TW",  # 興勤
-    "2430.TW",  # 燦坤
-    "2431.TW",  # 聯昌
-    "2433.TW",  # 互盛電
-    "2434.TW",  # 統懋
-    "2436.TW",  # 偉詮電
-    "2438.TW",  # 翔耀
-    "2439.TW",  # 美律
-    "2440.TW",  # 太空梭
-    "2441.TW",  # 超豐
-    "2442.TW",  # 新美齊
-    "2443.TW",  # 昶虹
-    "2444.TW",  # 友勁
-    "2449.TW",  # 京元電子
-    "2450.TW",  # 神腦
-    "2451.TW",  # 創見
-    "2453.TW",  # 凌群
-    "2454.TW",  # 聯發科
-    "2455.TW",  # 全新
-    "2457.TW",  # 飛宏
-    "2458.TW",  # 義隆
-    "2459.TW",  # 敦吉
-    "2460.TW",  # 建通
-    "2461.TW",  # 光群雷
-    "2462.TW",  # 良得電
-    "2464.TW",  # 盟立
-    "2465.TW",  # 麗臺
-    "2466.TW",  # 冠西電
-    "2467.TW",  # 志聖
-    "2468.TW",  # 華經
-    "2471.TW",  # 資通
-    "2472.TW",  # 立隆電
-    "2474.TW",  # 可成
-    "2476.TW",  # 鉅祥
-    "2477.TW",  # 美隆電
-    "2478.TW",  # 大毅
-    "2480.TW",  # 敦陽科
-    "2481.TW",  # 強茂
-    "2482.TW",  # 連宇
-    "2483.TW",  # 百容
-    "2484.TW",  # 希華
-    "2485.TW",  # 兆赫
-    "2486.TW",  # 一詮
-    "2488.TW",  # 漢平
-    "2489.TW",  # 瑞軒
-    "2491.TW",  # 吉祥全
-    "2492.TW",  # 華新科
-    "2493.TW",  # 揚博
-    "2495.TW",  # 普安
-    "2496.TW",  # 卓越
-    "2497.TW",  # 怡利電
-    "2498.TW",  # 宏達電
-    "2501.TW",  # 國建
-    "2504.TW",  # 國產
-    "2505.TW",  # 國美
-    "2506.TW",  # 太設
-    "2509.TW",  # 全坤建
-    "2511.TW",  # 太子
-    "2514.TW",  # 龍邦
-    "2515.TW",  # 中工
-    "2516.TW",  # 新建
-    "2520.TW",  # 冠德
-    "2524.TW",  # 京城
-    "2527.TW",  # 宏璟
-    "2528.TW",  # 皇普
-    "2530.TW",  # 華建
-    "2534.TW",  # 宏盛
-    "2535.TW",  # 達欣工
-    "2536.TW",  # 宏普
-    "2537.TW",  # 聯上發
-    "2538.TW",  # 基泰
-    "2539.TW",  # 櫻花建
-    "2542.TW",  # 興富發
-    "2543.TW",  # 皇昌
-    "2545.TW",  # 皇翔
-    "2546.TW",  # 根基
-    "2547.TW",  # 日勝生
-    "2548.TW",  # 華固
-    "2597.TW",  # 潤弘
-    "2601.TW",  # 益航
-    "2603.TW",  # 長榮
-    "2605.TW",  # 新興
-    "2606.TW",  # 裕民
-    "2607.TW",  # 榮運
-    "2608.TW",  # 大榮
-    "2609.TW",  # 陽明
-    "2610.TW",  # 華航
-    "2611.TW",  # 志信
-    "2612.TW",  # 中航
-    "2613.TW",  # 中櫃
-    "2614.TW",  # 東森
-    "2615.TW",  # 萬海
-    "2616.TW",  # 山隆
-    "2617.TW",  # 台航
-    "2618.TW",  # 長榮航
-    "2630.TW",  # 亞航
-    "2633.TW",  # 台灣高鐵
-    "2634.TW",  # 漢翔
-    "2636.TW",  # 台驊
-    "2637.TW",  # 慧洋-KY
-    "2642.TW",  # 宅配通
-    "2701.TW",  # 萬企
-    "2702.TW",  # 華園
-    "2704.TW",  # 國賓
-    "2705.TW",  # 六福
-    "2706.TW",  # 第一店
-    "2707.TW",  # 晶華
-    "2712.TW",  # 遠雄來
-    "2722.TW",  # 夏都
-    "2723.TW",  # 美食-KY
-    "2727.TW",  # 王品
-    "2731.TW",  # 雄獅
-    "2739.TW",  # 寒舍
-    "2748.TW",  # 汎武
-    "2753.TW",  # 八方雲集
-    "2801.TW",  # 彰銀
-    "2812.TW",  # 台中銀
-    "2816.TW",  # 旺旺保
-    "2820.TW",  # 華票
-    "2832.TW",  # 台產
-    "2834.TW",  # 臺企銀
-    "2836.TW",  # 萬泰銀
-    "2838.TW",  # 聯邦銀
-    "2845.TW",  # 遠東銀
-    "2849.TW",  # 安泰銀
-    "2850.TW",  # 新產
-    "2851.TW",  # 中再保
-    "2852.TW",  # 第一保
-    "2855.TW",  # 寶來證
-    "2867.TW",  # 三商壽
-    "2880.TW",  # 華南金
-    "2881.TW",  # 富邦金
-    "2882.TW",  # 國泰金
-    "2883.TW",  # 開發金
-    "2884.TW",  # 玉山金
-    "2885.TW",  # 元大金
-    "2886.TW",  # 兆豐金
-    "2887.TW",  # 台新金
-    "2889.TW",  # 國票金
-    "2890.TW",  # 永豐金
-    "2891.TW",  # 中信金
-    "2892.TW",  # 第一金
-    "2897.TW",  # 王道銀
-    "2901.TW",  # 欣欣
-    "2903.TW",  # 遠百
-    "2905.TW",  # 三商
-    "2906.TW",  # 高林
-    "2908.TW",  # 特力
-    "2910.TW",  # 統領
-    "2911.TW",  # 麗嬰房
-    "2912.TW",  # 統一超
-    "2913.TW",  # 農林
-    "2915.TW",  # 潤泰全
-    "2939.TW",  # 凱羿-KY
-    "3002.TW",  # 歐格
-    "3003.TW",  # 健和興
-    "3004.TW",  # 豐達科
-    "3005.TW",  # 神基
-    "3006.TW",  # 晶豪科
-    "3008.TW",  # 大立光
-    "3010.TW",  # 華立
-    "3011.TW",  # 今皓
-    "3013.TW",  # 晟銘電
-    "3014.TW",  # 聯陽
-    "3015.TW",  # 全漢
-    "3016.TW",  # 嘉晶
-    "3017.TW",  # 奇鋐
-    "3018.TW",  # 同開
-    "3019.TW",  # 亞光
-    "3021.TW",  # 鴻名
-    "3022.TW",  # 威強電
-    "3023.TW",  # 信邦
-    "3024.TW",  # 憶聲
-    "3025.TW",  # 星通
-    "3026.TW",  # 禾伸堂
-    "3027.TW",  # 盛達
-    "3028.TW",  # 增你強
-    "3029.TW",  # 零壹
-    "3030.TW",  # 德律
-    "3031.TW",  # 佰鴻
-    "3032.TW",  # 偉訓
-    "3033.TW",  # 威健
-    "3034.TW",  # 聯詠
-    "3035.TW",  # 智原
-    "3036.TW",  # 文曄
-    "3037.TW",  # 欣興
-    "3038.TW",  # 全台
-    "3040.TW",  # 遠見
-    "3041.TW",  # 揚智
-    "3042.TW",  # 晶技
-    "3043.TW",  # 科風
-    "3044.TW",  # 健鼎
-    "3045.TW",  # 台灣大
-    "3046.TW",  # 建碁
-    "3047.TW",  # 訊舟
-    "3048.TW",  # 益登
-    "3049.TW",  # 和鑫
-    "3050.TW",  # 鈺德
-]
+# 股票池: universe.csv (代號/名稱/市場/產業) 匯入 universe.db, 見 universe.py
+UNIVERSE_FILE = Path("universe.csv")
+UNIVERSE_DB = Path("universe.db")
+DELIST_AFTER_FAILURES = 3  # days without a quote before a symbol is marked inactive
 
 YEARS_FOR_PAYOUT = 5
 YIELD_THRESHOLD = 0.06
 
-STATE_FILE = Path("state.json")
+# 多情境 EPS 估計 (--scenarios): 情境名稱 -> estimators.py 的估計方法
+EPS_SCENARIOS = {
+    "conservative": "p25",
+    "neutral": "sma3",
+    "optimistic": "p75",
+}
 
-RESULT_DIR = Path("result")
-RESULT_DIR.mkdir(exist_ok=True)
+# 並行抓取設定 (per-symbol worker pool)
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 60  # seconds per attempt
+FETCH_RETRIES = 1
+FETCH_BACKOFF = 1.0  # seconds, doubled on each retry
+PRICE_CHUNK_SIZE = 100  # tickers per yf.download request
+EVENT_QUEUE_SIZE = 32  # triggered symbols waiting for recalculation (backpressure)
+# full re-check at least this often even if the probe is unchanged; the probe only
+# sees price / ex-dividend changes, so EPS and news changes can be seen this late
+PROBE_MAX_AGE_DAYS = 1
+
+# Yahoo 請求節流 (rate_limiter.RequestGovernor, live/record only)
+RATE_LIMIT = 4.0  # starting requests/s, adapted up/down at run time (AIMD)
+RATE_MIN = 0.5
+RATE_MAX = 15.0
+RATE_INCREASE = 0.05  # requests/s added per successful call
+RATE_BURST = 8
+RATE_RETRIES = 3  # retries of a 429 / empty response
+RATE_THROTTLE_MEMORY = 30.0  # seconds after a 429 during which an empty info / download also counts as one
+RATE_BACKOFF = 2.0  # seconds, doubled on each retry
+RATE_BACKOFF_MAX = 30.0
+BREAKER_WINDOW = 40  # recent calls the error rate is measured over
+BREAKER_ERROR_RATE = 0.5
+BREAKER_COOLDOWN = 60.0  # seconds every caller pauses once the breaker trips (then one failure re-trips it)
+
+# yfinance payload 快取 (per-field TTL, seconds)
+CACHE_DIR = Path(".cache") / "yfinance"
+CACHE_TTL = {
+    "price": 15 * 60,
+    "info": 24 * 3600,  # price comes from the bulk download, not info; the trigger scan bypasses this
+    "news": 30 * 60,
+    "dividends": 24 * 3600,
+    "quarterly_income_stmt": 3 * 24 * 3600,
+    "quarterly_financials": 3 * 24 * 3600,
+    "history": 24 * 3600,  # daily close + dividends for backtests
+}
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_MEMORY_ENTRIES = 50_000  # in-process layer, used by --mode daemon
+
+# 錄製/重播用的 yfinance 回應 (--source record / replay)
+FIXTURES_DIR = Path("fixtures")
+
+# 分片執行 (--shard i/N) 的各分片輸出, 由 --mode merge 合併
+SHARD_DIR = Path("shards")
+
+# 中斷續跑 (--resume): 已完成的標的定期寫入 checkpoints/
+CHECKPOINT_DIR = Path("checkpoints")
+CHECKPOINT_EVERY = 25  # symbols per flush
+CHECKPOINT_SECONDS = 30.0  # ...or at least this often
+
+# 季報正規化儲存 (statements.py): 每季淨利/股數/EPS, 增量合併
+STATEMENT_DB = Path("statements.db")
+STATEMENT_RECHECK_DAYS = 1  # a symbol's statement is fetched at most once a day
+STATEMENT_MAX_AGE_DAYS = 30  # ...and at least this often, to pick up restatements
+
+STATE_DB = Path("state.db")
+STATE_FILE = Path("state.json")  # legacy; imported into STATE_DB on first run
+
+# 常駐模式 (--mode daemon): 持股高頻檢查, 其餘每日
+HELD_SYMBOLS = []
+DAEMON_TIERS = {
+    # probe_max_age_days 0: full trigger scan (EPS / dividends / news) on every tick
+    "held": {"interval": 15 * 60, "probe_max_age_days": 0},
+    "all": {"interval": 24 * 3600},
+}
+
+# 本機查詢服務 (--mode serve)
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+
+# 回測設定
+BACKTEST_YEARS = 10
+BACKTEST_FREQ = "ME"  # pandas offset alias for rebalance dates (month end)
+REPORT_LAG_DAYS = 45  # quarterly results assumed public this long after quarter end
+
+HISTORY_DIR = Path("history")  # per-run snapshot archives (.npz)
+HISTORY_KEEP_RUNS = 200  # newest per-run archives kept as is; older runs are folded into monthly archives
+
+RESULT_DIR = Path("result")  # created on first write
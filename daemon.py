@@ -0,0 +1,121 @@
+import time
+from datetime import datetime
+
+import config
+from trigger_engine import event_mode, load_state, save_state
+
+
+def build_tiers(symbols, held=None, tier_config=None, probe_max_age_days=None):
+    """Split symbols into scan tiers.
+
+    Returns a list of {"name", "symbols", "interval", "probe_max_age_days"}:
+    the "held" tier gets the held symbols (fully scanned on every tick),
+    the "all" tier everything else. Empty tiers are dropped. Tiers whose
+    config sets no probe_max_age_days get `probe_max_age_days` (None =
+    config.PROBE_MAX_AGE_DAYS).
+    """
+    tier_config = tier_config or config.DAEMON_TIERS
+    held = [s for s in (held if held is not None else config.HELD_SYMBOLS) if s]
+    held_set = set(held)
+    members = {
+        "held": list(held),
+        "all": [s for s in symbols if s not in held_set],
+    }
+
+    tiers = []
+    for name, cfg in tier_config.items():
+        syms = members.get(name, [])
+        if syms:
+            tiers.append({
+                "name": name,
+                "symbols": syms,
+                "interval": float(cfg["interval"]),
+                "probe_max_age_days": cfg.get("probe_max_age_days", probe_max_age_days),
+            })
+    return tiers
+
+
+class EventDaemon:
+    """Long-running event scanner (--mode daemon).
+
+    Keeps one process, one in-memory state dict and the warm payload cache
+    across ticks, and runs event_mode for each tier on its own cadence.
+    Only symbols whose tracked state changed are written to the state DB
+    each tick; the full in-memory state is flushed on shutdown.
+    listeners are called as listener(tier_name, df_trig, df_high) after
+    every tier run.
+    """
+
+    def __init__(self, tiers, years_for_payout, yield_threshold, workers=None, timeout=None,
+                 retries=None, probe=True):
+        self.tiers = tiers
+        self.years_for_payout = years_for_payout
+        self.yield_threshold = yield_threshold
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.probe = probe
+        self.listeners = []
+        self.state = load_state([s for t in tiers for s in t["symbols"]])
+        self._next_due = {t["name"]: 0.0 for t in tiers}
+        self._stop = False
+
+    def stop(self):
+        self._stop = True
+
+    def run_tier(self, tier):
+        print(f"\n[DAEMON] {datetime.now():%Y-%m-%d %H:%M:%S} tier={tier['name']} "
+              f"symbols={len(tier['symbols'])}", flush=True)
+        df_trig, df_high = event_mode(
+            tier["symbols"],
+            self.years_for_payout,
+            self.yield_threshold,
+            workers=self.workers,
+            timeout=self.timeout,
+            retries=self.retries,
+            probe=self.probe,
+            state=self.state,
+            persist="changed",
+            probe_max_age_days=tier.get("probe_max_age_days"),
+        )
+        for listener in self.listeners:
+            try:
+                listener(tier["name"], df_trig, df_high)
+            except Exception as e:
+                print(f"[WARN] daemon listener failed: {e}")
+        return df_trig, df_high
+
+    def run(self, once=False):
+        try:
+            while not self._stop:
+                for tier in self.tiers:
+                    if time.time() >= self._next_due[tier["name"]]:
+                        try:
+                            self.run_tier(tier)
+                        except Exception as e:
+                            print(f"[WARN] tier {tier['name']} failed: {e}", flush=True)
+                        self._next_due[tier["name"]] = time.time() + tier["interval"]
+                if once:
+                    break
+                wait = min(self._next_due.values()) - time.time()
+                # sleep in short slices so stop() and Ctrl-C are responsive
+                time.sleep(max(0.0, min(wait, 5.0)))
+        except KeyboardInterrupt:
+            print("\n[DAEMON] stopping")
+        finally:
+            self.flush()
+
+    def flush(self):
+        """Persist the whole in-memory state (incl. last full-check times)."""
+        save_state(self.state)
+
+
+def daemon_mode(symbols, years_for_payout, yield_threshold, held=None, workers=None, timeout=None,
+                retries=None, probe=True, once=False, probe_max_age_days=None):
+    tiers = build_tiers(symbols, held, probe_max_age_days=probe_max_age_days)
+    for t in tiers:
+        print(f"[DAEMON] tier {t['name']}: {len(t['symbols'])} symbols every {t['interval']:g}s")
+    daemon = EventDaemon(tiers, years_for_payout, yield_threshold, workers=workers, timeout=timeout,
+                         retries=retries, probe=probe)
+    daemon.run(once=once)
+    return daemon
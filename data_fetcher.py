@@ -1,8 +1,300 @@
+from __future__ import annotations
+
+import hashlib
 from datetime import datetime
+from typing import TYPE_CHECKING
+
 import pandas as pd
-import yfinance as yf
 
+import config
+import metrics
+
+if TYPE_CHECKING:  # only for annotations; yfinance is imported by data_sources.LiveSource
+    import yfinance as yf
+
+
+# Shared on-disk payload cache (payload_cache.PayloadCache); None = no caching.
+_cache = None
+
+# Backend every payload comes from (data_sources.DataSource); None = live yfinance.
+_source = None
+
+
+def set_cache(cache):
+    global _cache
+    _cache = cache
+
+
+def get_cache():
+    return _cache
+
+
+def set_source(source):
+    global _source
+    _source = source
+
+
+def get_source():
+    global _source
+    if _source is None:
+        from data_sources import make_source
+        _source = make_source("live")
+    return _source
+
+
+class SymbolSnapshot:
+    """One symbol's yfinance payloads, each fetched at most once.
+
+    Exposes the same attributes the code reads from yf.Ticker (info,
+    dividends, quarterly_income_stmt, quarterly_financials, news), so it can
+    be passed anywhere a Ticker was. Trigger detection and yield estimation
+    share one snapshot instead of building a Ticker each.
+
+    Payloads are read through the shared cache (see set_cache) when one is
+    configured, and from the data source (see set_source) on a miss. Fields
+    listed in `refresh` (or passed to refresh()) skip the cache read and
+    always come from the source; the fetched payload still replaces the
+    cached one.
+    """
+
+    def __init__(self, symbol: str, source=None, cache=None, refresh=()):
+        self.symbol = symbol
+        self._source = source
+        self._cache = cache if cache is not None else _cache
+        self._refresh = set(refresh)
+        self._payloads = {}
+        self._cached = set()  # fields whose payload came from the cache
+
+    def refresh(self, *fields):
+        """From now on, serve `fields` from the source; a payload this snapshot read from the cache is dropped."""
+        self._refresh.update(fields)
+        for field in self._cached.intersection(fields):
+            del self._payloads[field]
+            self._cached.discard(field)
+
+    def _get(self, field: str):
+        if field not in self._payloads:
+            if self._cache is not None and field not in self._refresh:
+                with metrics.timed("cache_read"):
+                    hit, value = self._cache.get(self.symbol, field)
+                if hit:
+                    self._payloads[field] = (value, None)
+                    self._cached.add(field)
+                    return value
+            try:
+                with metrics.timed(f"fetch.{field}"):
+                    value = (self._source or get_source()).fetch(self.symbol, field)
+                self._payloads[field] = (value, None)
+                if self._cache is not None:
+                    self._cache.put(self.symbol, field, value)
+            except Exception as e:
+                # remember the failure too, so callers don't refetch it
+                self._payloads[field] = (None, e)
+        value, err = self._payloads[field]
+        if err is not None:
+            raise err
+        return value
+
+    @property
+    def info(self):
+        return self._get("info")
+
+    @property
+    def dividends(self):
+        return self._get("dividends")
+
+    @property
+    def quarterly_income_stmt(self):
+        return self._get("quarterly_income_stmt")
+
+    @property
+    def quarterly_financials(self):
+        return self._get("quarterly_financials")
 
+    @property
+    def news(self):
+        return self._get("news")
+
+
+def _last_close(frame: pd.DataFrame, symbols) -> dict:
+    """Pull {symbol: last non-NaN close} out of a yf.download result."""
+    if frame is None or frame.empty or "Close" not in frame.columns.get_level_values(0):
+        return {}
+    close = frame["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(symbols[0])
+    last = close.ffill().iloc[-1]
+    return {
+        sym: float(last[sym])
+        for sym in symbols
+        if sym in last.index and pd.notna(last[sym]) and last[sym] > 0
+    }
+
+
+@metrics.timed("probe_download")
+def probe_bulk(symbols, chunk_size=None, cache=None, covered=None) -> dict:
+    """Cheap change probe for many symbols from batched yf.download calls.
+
+    One multi-ticker download (1 year of daily bars with actions) per chunk
+    yields, per symbol:
+      {"price": last close, "probe": hash of the latest ex-dividend date/amount}
+    The probe is compared to the stored state to decide whether the full
+    info / dividends / news fetch is needed at all. Prices are also written
+    to the cache (field "price") so the recalculation pass can reuse them.
+    Symbols Yahoo returns nothing for are absent. Pass a set as `covered`
+    to collect the symbols whose chunk download succeeded (an absent one
+    among them really had no quote; see universe.record_quotes).
+    """
+    cache = cache if cache is not None else _cache
+    chunk_size = chunk_size or config.PRICE_CHUNK_SIZE
+    symbols = list(dict.fromkeys(symbols))
+
+    out = {}
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        try:
+            frame = get_source().download(
+                chunk,
+                period="1y",
+                interval="1d",
+                actions=True,
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+            )
+        except Exception:
+            continue
+        if covered is not None:
+            covered.update(chunk)
+
+        prices = _last_close(frame, chunk)
+        has_divs = frame is not None and not frame.empty and "Dividends" in frame.columns.get_level_values(0)
+        for sym, price in prices.items():
+            last_div = None
+            if has_divs and sym in frame["Dividends"].columns:
+                paid = frame["Dividends"][sym]
+                paid = paid[paid > 0]
+                if not paid.empty:
+                    last_div = f"{paid.index[-1].date()}:{round(float(paid.iloc[-1]), 4)}"
+            out[sym] = {
+                "price": price,
+                "probe": hashlib.sha1(str(last_div).encode("utf-8")).hexdigest()[:16],
+            }
+            if cache is not None:
+                cache.put(sym, "price", price)
+    return out
+
+
+@metrics.timed("price_download")
+def get_prices_bulk(symbols, chunk_size=None, cache=None, covered=None) -> dict:
+    """Latest price for many symbols via chunked multi-ticker yf.download.
+
+    Replaces one heavyweight tk.info call per symbol with a handful of
+    batched requests. Cached prices (field "price") are reused; symbols
+    Yahoo returns nothing for are simply absent, so callers can fall back
+    to get_price(snapshot) on a refreshed info (see collect_yield_inputs).
+    `covered` as in probe_bulk (cached prices count).
+    """
+    cache = cache if cache is not None else _cache
+    chunk_size = chunk_size or config.PRICE_CHUNK_SIZE
+
+    prices = {}
+    missing = []
+    for sym in dict.fromkeys(symbols):
+        hit, value = cache.get(sym, "price") if cache is not None else (False, None)
+        if hit:
+            prices[sym] = value
+        else:
+            missing.append(sym)
+    if covered is not None:
+        covered.update(prices)
+
+    for i in range(0, len(missing), chunk_size):
+        chunk = missing[i:i + chunk_size]
+        try:
+            frame = get_source().download(
+                chunk,
+                period="5d",
+                interval="1d",
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+            )
+        except Exception:
+            continue
+        if covered is not None:
+            covered.update(chunk)
+        for sym, price in _last_close(frame, chunk).items():
+            prices[sym] = price
+            if cache is not None:
+                cache.put(sym, "price", price)
+
+    return prices
+
+
+def get_history_bulk(symbols, start, end=None, chunk_size=None, cache=None):
+    """Daily close and dividend history for many symbols.
+
+    Returns (close, dividends): two date x symbol DataFrames, built from
+    chunked multi-ticker yf.download(actions=True) calls. Each symbol's
+    history is cached (field "history"); a cached frame is reused when it
+    already covers `start`.
+    """
+    cache = cache if cache is not None else _cache
+    chunk_size = chunk_size or config.PRICE_CHUNK_SIZE
+    start = pd.Timestamp(start)
+
+    per_symbol = {}
+    missing = []
+    for sym in dict.fromkeys(symbols):
+        hit, frame = cache.get(sym, "history") if cache is not None else (False, None)
+        if hit and not frame.empty and frame.index[0] <= start + pd.Timedelta(days=7):
+            per_symbol[sym] = frame
+        else:
+            missing.append(sym)
+
+    for i in range(0, len(missing), chunk_size):
+        chunk = missing[i:i + chunk_size]
+        try:
+            data = get_source().download(
+                chunk,
+                start=start,
+                end=end,
+                interval="1d",
+                actions=True,
+                auto_adjust=False,
+                progress=False,
+                threads=True,
+            )
+        except Exception:
+            continue
+        if data is None or data.empty:
+            continue
+        for sym in chunk:
+            try:
+                frame = pd.DataFrame({
+                    "Close": data["Close"][sym],
+                    "Dividends": data["Dividends"][sym] if "Dividends" in data.columns.get_level_values(0) else 0.0,
+                }).dropna(subset=["Close"])
+            except KeyError:
+                continue
+            if frame.empty:
+                continue
+            per_symbol[sym] = frame
+            if cache is not None:
+                cache.put(sym, "history", frame)
+
+    if not per_symbol:
+        return pd.DataFrame(), pd.DataFrame()
+    close = pd.DataFrame({sym: f["Close"] for sym, f in per_symbol.items()}).sort_index()
+    dividends = pd.DataFrame({sym: f["Dividends"] for sym, f in per_symbol.items()}).sort_index()
+    if end is not None:
+        close = close.loc[:pd.Timestamp(end)]
+        dividends = dividends.loc[:pd.Timestamp(end)]
+    return close, dividends.fillna(0.0)
+
+
+@metrics.timed("safe_info")
 def safe_info(tk: yf.Ticker) -> dict:
     try:
         return tk.info or {}
@@ -26,24 +318,6 @@ def get_shares_outstanding(tk: yf.Ticker):
     return float(sh) if isinstance(sh, (int, float)) and sh > 0 else None
 
 
-def get_dividend_by_year(dividends: pd.Series):
-    """Return {year: total_dividend_per_share}"""
-    if dividends is None or dividends.empty:
-        return {}
-    df = dividends.reset_index()
-    df.columns = ["Date", "Dividend"]
-    df["Year"] = df["Date"].dt.year
-    return df.groupby("Year")["Dividend"].sum().to_dict()
-
-
-def latest_dividend_snapshot(div_by_year: dict):
-    """Return (latest_year, latest_year_total_dividend)."""
-    if not div_by_year:
-        return None, 0.0
-    y = max(div_by_year.keys())
-    return int(y), float(div_by_year[y])
-
-
 def latest_news_ts(tk: yf.Ticker):
     """Return latest news publish timestamp (epoch seconds), if available."""
     try:
@@ -0,0 +1,309 @@
+import hashlib
+import json
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+class ReplayError(Exception):
+    """Simulated network failure injected by ReplaySource."""
+
+
+class DataSource:
+    """Backend that data_fetcher reads every yfinance payload from.
+
+    - fetch(symbol, field): one Ticker attribute (info, dividends,
+      quarterly_income_stmt, quarterly_financials, news)
+    - download(symbols, **kwargs): a multi-ticker yf.download frame with
+      (Price, Ticker) columns
+    """
+
+    name = "base"
+
+    def fetch(self, symbol: str, field: str):
+        raise NotImplementedError
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class LiveSource(DataSource):
+    """Talks to Yahoo through yfinance."""
+
+    name = "live"
+
+    def fetch(self, symbol: str, field: str):
+        import yfinance as yf
+        return getattr(yf.Ticker(symbol), field)
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        import yfinance as yf
+        return yf.download(list(symbols), **kwargs)
+
+
+def _is_empty_payload(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, (dict, list)):
+        return not value
+    return bool(getattr(value, "empty", False))
+
+
+class GovernedSource(DataSource):
+    """Routes every call of `inner` through a shared RequestGovernor.
+
+    Only payloads that are never legitimately empty are checked: an empty
+    info dict or download frame is retried as throttling when it comes
+    right after a 429, and is otherwise a plain miss (e.g. a delisted
+    ticker). A symbol with no dividends or news passes straight through.
+    """
+
+    RETRY_EMPTY_FIELDS = ("info",)
+
+    def __init__(self, inner: DataSource, governor=None):
+        from rate_limiter import RequestGovernor
+
+        self.inner = inner
+        self.name = inner.name
+        self.governor = governor or RequestGovernor()
+
+    def fetch(self, symbol: str, field: str):
+        is_empty = _is_empty_payload if field in self.RETRY_EMPTY_FIELDS else None
+        return self.governor.call(lambda: self.inner.fetch(symbol, field), is_empty=is_empty)
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        symbols = list(symbols)
+        return self.governor.call(lambda: self.inner.download(symbols, **kwargs), is_empty=_is_empty_payload)
+
+
+def _download_key(kwargs) -> str:
+    # recorded per symbol, so any later chunking of the same request replays
+    blob = json.dumps({k: str(v) for k, v in sorted(kwargs.items())}, sort_keys=True)
+    return "download_" + hashlib.sha1(blob.encode("utf-8")).hexdigest()[:12]
+
+
+def _split_download(frame: pd.DataFrame, symbols) -> dict:
+    """{symbol: single-ticker frame} from a multi-ticker yf.download result."""
+    if frame is None or frame.empty or not isinstance(frame.columns, pd.MultiIndex):
+        return {}
+    tickers = set(frame.columns.get_level_values(1))
+    return {sym: frame.xs(sym, axis=1, level=1) for sym in symbols if sym in tickers}
+
+
+def _join_download(parts: dict) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame()
+    joined = pd.concat(parts, axis=1)  # (Ticker, Price)
+    joined = joined.swaplevel(0, 1, axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    joined.columns.names = ["Price", "Ticker"]
+    return joined
+
+
+class FixtureStore:
+    """fixtures/<field>/<symbol>.pkl files holding ("ok", value) or ("error", message)."""
+
+    def __init__(self, root=None):
+        self.root = Path(root if root is not None else config.FIXTURES_DIR)
+
+    def _path(self, symbol: str, field: str) -> Path:
+        return self.root / field / f"{symbol}.pkl"
+
+    def write(self, symbol: str, field: str, status: str, value):
+        path = self._path(symbol, field)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((status, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def read(self, symbol: str, field: str):
+        """Return (status, value), or None if nothing was recorded."""
+        try:
+            with self._path(symbol, field).open("rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+
+class RecordSource(DataSource):
+    """Passes calls through to `inner` and records every response to disk."""
+
+    name = "record"
+
+    def __init__(self, inner: DataSource = None, root=None):
+        self.inner = inner or LiveSource()
+        self.store = FixtureStore(root)
+
+    def fetch(self, symbol: str, field: str):
+        try:
+            value = self.inner.fetch(symbol, field)
+        except Exception as e:
+            self.store.write(symbol, field, "error", f"{type(e).__name__}: {e}")
+            raise
+        self.store.write(symbol, field, "ok", value)
+        return value
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        symbols = list(symbols)
+        frame = self.inner.download(symbols, **kwargs)
+        key = _download_key(kwargs)
+        for sym, part in _split_download(frame, symbols).items():
+            self.store.write(sym, key, "ok", part)
+        return frame
+
+
+class ReplaySource(DataSource):
+    """Serves recorded fixtures, optionally with simulated latency and errors.
+
+    Missing fixtures come back as None (what a failed yfinance call looks
+    like to the callers). Injected errors are derived from a hash of
+    (seed, symbol, field, call number), so a replay is deterministic even
+    with a worker pool, and a retried call can succeed.
+    """
+
+    name = "replay"
+
+    def __init__(self, root=None, latency=0.0, error_rate=0.0, seed=0):
+        self.store = FixtureStore(root)
+        self.latency = float(latency or 0.0)
+        self.error_rate = float(error_rate or 0.0)
+        self.seed = seed
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _simulate(self, symbol: str, field: str):
+        with self._lock:
+            n = self._calls.get((symbol, field), 0)
+            self._calls[(symbol, field)] = n + 1
+        rnd = random.Random(f"{self.seed}:{symbol}:{field}:{n}")
+        if self.latency:
+            time.sleep(self.latency * (0.5 + rnd.random()))
+        if self.error_rate and rnd.random() < self.error_rate:
+            raise ReplayError(f"simulated failure for {symbol} {field}")
+
+    def fetch(self, symbol: str, field: str):
+        self._simulate(symbol, field)
+        rec = self.store.read(symbol, field)
+        if rec is None:
+            return None
+        status, value = rec
+        if status == "error":
+            raise ReplayError(value)
+        return value
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        symbols = list(symbols)
+        key = _download_key(kwargs)
+        self._simulate(",".join(symbols), key)
+        parts = {}
+        for sym in symbols:
+            rec = self.store.read(sym, key)
+            if rec is not None and rec[0] == "ok":
+                parts[sym] = rec[1]
+        return _join_download(parts)
+
+
+class SyntheticSource(DataSource):
+    """Generates plausible, deterministic payloads for any symbol.
+
+    Every value is derived from (seed, symbol), so a universe of any size can
+    be screened offline, e.g. by bench.py, with reproducible results.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed=0, latency=0.0):
+        self.seed = seed
+        self.latency = float(latency or 0.0)
+
+    def _rng(self, symbol: str, salt: str = ""):
+        return random.Random(f"{self.seed}:{symbol}:{salt}")
+
+    def _profile(self, symbol: str):
+        r = self._rng(symbol)
+        return {
+            "price": round(r.uniform(10, 600), 2),
+            "eps": round(r.uniform(-2, 30), 2),
+            "shares": r.randint(50_000_000, 5_000_000_000),
+            "payout": r.uniform(0.2, 1.0),
+        }
+
+    def fetch(self, symbol: str, field: str):
+        if self.latency:
+            time.sleep(self.latency)
+        prof = self._profile(symbol)
+        r = self._rng(symbol, field)
+
+        if field == "info":
+            return {
+                "currentPrice": prof["price"],
+                "trailingEps": prof["eps"],
+                "sharesOutstanding": prof["shares"],
+            }
+        if field == "dividends":
+            this_year = pd.Timestamp.now().year
+            years = range(this_year - 10, this_year)
+            idx = pd.DatetimeIndex(
+                [pd.Timestamp(y, 7, 15) for y in years if r.random() > 0.1]
+            ).tz_localize("Asia/Taipei")
+            base = max(prof["eps"], 0.1) * prof["payout"]
+            return pd.Series([round(base * r.uniform(0.7, 1.3), 4) for _ in idx], index=idx, name="Dividends")
+        if field in ("quarterly_income_stmt", "quarterly_financials"):
+            quarters = pd.date_range(end=pd.Timestamp.now().normalize(), periods=5, freq="QE")[::-1]
+            ni = [prof["eps"] / 4.0 * prof["shares"] * r.uniform(0.6, 1.4) for _ in quarters]
+            return pd.DataFrame([ni], index=["Net Income"], columns=quarters)
+        if field == "news":
+            # anchored to today's midnight so repeated runs see the same items
+            today = int(pd.Timestamp.now().normalize().timestamp())
+            return [{"providerPublishTime": today - r.randint(0, 7 * 86400)} for _ in range(r.randint(0, 5))]
+        return None
+
+    def download(self, symbols, **kwargs) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        end = pd.Timestamp(kwargs.get("end") or pd.Timestamp.now()).normalize()
+        if kwargs.get("start") is not None:
+            dates = pd.bdate_range(pd.Timestamp(kwargs["start"]), end)
+        else:
+            period = str(kwargs.get("period") or "5d")
+            num = int("".join(ch for ch in period if ch.isdigit()) or 5)
+            days = num * {"d": 1, "mo": 31, "y": 366}.get(period.lstrip("0123456789"), 1)
+            dates = pd.bdate_range(end=end, periods=num) if period.endswith("d") else pd.bdate_range(end - pd.Timedelta(days=days), end)
+
+        parts = {}
+        july_ex = None
+        for sym in symbols:
+            prof = self._profile(sym)
+            rng = np.random.default_rng(zlib.crc32(f"{self.seed}:{sym}:download".encode()))
+            steps = rng.normal(0.0, 0.015, len(dates))
+            # random walk that ends exactly at the profile (info) price
+            log_rel = np.concatenate([np.cumsum(steps[:0:-1])[::-1], [0.0]])
+            close = prof["price"] * np.exp(-log_rel)
+            if july_ex is None:
+                ex = (dates.month == 7) & (dates.day >= 15)
+                july_ex = ex & ~pd.Series(ex, index=dates).groupby(dates.year).shift(1, fill_value=False).to_numpy()
+            divs = np.where(july_ex, round(max(prof["eps"], 0.1) * prof["payout"], 4), 0.0)
+            parts[sym] = pd.DataFrame({"Close": close, "Dividends": divs}, index=dates)
+        return _join_download(parts)
+
+
+def make_source(kind: str, fixtures=None, latency=0.0, error_rate=0.0, seed=0) -> DataSource:
+    if kind == "live":
+        return GovernedSource(LiveSource())
+    if kind == "record":
+        return RecordSource(GovernedSource(LiveSource()), fixtures)
+    if kind == "replay":
+        return ReplaySource(fixtures, latency=latency, error_rate=error_rate, seed=seed)
+    if kind == "synthetic":
+        return SyntheticSource(seed=seed, latency=latency)
+    raise ValueError(f"unknown data source: {kind}")
@@ -0,0 +1,138 @@
+"""Next-quarter EPS estimators over the symbol x quarter EPS matrix.
+
+Every estimator takes the whole matrix (rows = symbols, columns =
+quarters, most recent first, NaN = missing) as one float ndarray and
+returns one estimate per row, NaN where it has too little data. They are
+plain array operations, so estimating every scenario for the universe is
+one pass over data already in memory: nothing is refetched or reparsed
+per scenario.
+
+Scenarios (config.EPS_SCENARIOS) are labels mapped to estimators, e.g.
+conservative -> p25; compute_yield_table adds next_q_eps_<label> and
+est_yield_%_<label> columns for each.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import config
+
+
+ESTIMATORS = {}
+
+
+def estimator(name):
+    def register(fn):
+        ESTIMATORS[name] = fn
+        return fn
+    return register
+
+
+def _window(q, n):
+    """First n quarters, NaN-padded when fewer columns exist."""
+    if q.shape[1] >= n:
+        return q[:, :n]
+    pad = np.full((q.shape[0], n - q.shape[1]), np.nan)
+    return np.hstack([q, pad])
+
+
+@estimator("sma3")
+def sma3(q):
+    """Mean of the 3 most recent quarters (the original rule)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(_window(q, 3), axis=1)
+
+
+@estimator("wma4")
+def wma4(q):
+    """Linearly weighted mean of the last 4 quarters, weights 4:3:2:1."""
+    w = _window(q, 4)
+    weights = np.array([4.0, 3.0, 2.0, 1.0])
+    mask = ~np.isnan(w)
+    total = (mask * weights).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, np.nansum(w * weights, axis=1) / total, np.nan)
+
+
+@estimator("trend")
+def trend(q, quarters=8, min_points=3):
+    """Least-squares line through the last `quarters` quarters, one step ahead."""
+    y = _window(q, quarters)
+    x = -np.arange(quarters, dtype=float)  # most recent quarter at 0, next at +1
+    mask = ~np.isnan(y)
+    y0 = np.where(mask, y, 0.0)
+    n = mask.sum(axis=1)
+    sx = (mask * x).sum(axis=1)
+    sxx = (mask * x * x).sum(axis=1)
+    sy = y0.sum(axis=1)
+    sxy = (y0 * x).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        intercept = (sy - slope * sx) / n
+    return np.where(n >= min_points, intercept + slope, np.nan)
+
+
+@estimator("seasonal")
+def seasonal(q):
+    """Same quarter last year: the 4th most recent quarter."""
+    return _window(q, 4)[:, 3]
+
+
+def _percentile(p, quarters=8):
+    def band(q):
+        # np.nanpercentile loops over rows once any row has a NaN; sorting
+        # pushes NaNs last, so each row's linear-interpolated rank is direct
+        w = np.sort(_window(q, quarters), axis=1)
+        n = (~np.isnan(w)).sum(axis=1)
+        pos = np.maximum(n - 1, 0) * (p / 100.0)
+        lo = np.floor(pos).astype(int)
+        hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+        rows = np.arange(w.shape[0])
+        frac = pos - lo
+        out = w[rows, lo] * (1.0 - frac) + w[rows, hi] * frac
+        return np.where(n > 0, out, np.nan)
+    band.__doc__ = f"{p}th percentile of the last {quarters} quarters."
+    return band
+
+
+for _p in (10, 25, 50, 75, 90):
+    estimator(f"p{_p}")(_percentile(_p))
+
+
+def resolve(names) -> dict:
+    """{label: estimator name} for scenario labels and/or estimator names.
+
+    "all" expands to every configured scenario.
+    """
+    out = {}
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if name == "all":
+            out.update(config.EPS_SCENARIOS)
+        elif name in config.EPS_SCENARIOS:
+            out[name] = config.EPS_SCENARIOS[name]
+        elif name in ESTIMATORS:
+            out[name] = name
+        else:
+            known = sorted(config.EPS_SCENARIOS) + sorted(ESTIMATORS)
+            raise ValueError(f"unknown EPS scenario/estimator {name!r} (known: {', '.join(known)})")
+    return out
+
+
+def estimate(eps_q: pd.DataFrame, scenarios) -> pd.DataFrame:
+    """symbol x label frame of next-quarter EPS, one column per scenario."""
+    scenarios = resolve(scenarios) if not isinstance(scenarios, dict) else scenarios
+    q = eps_q.to_numpy(dtype=float)
+    if q.ndim != 2 or q.shape[1] == 0:
+        q = np.full((len(eps_q.index), 1), np.nan)
+    cache = {}
+    cols = {}
+    for label, name in scenarios.items():
+        if name not in cache:
+            cache[name] = ESTIMATORS[name](q)
+        cols[label] = cache[name]
+    return pd.DataFrame(cols, index=eps_q.index)
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import metrics
+
+
+class SymbolTimeout(Exception):
+    """Raised when one attempt for a symbol exceeds its time budget."""
+
+
+def _call_with_timeout(fn, symbol, timeout):
+    """Run fn(symbol), giving up after `timeout` seconds.
+
+    The attempt runs in a daemon thread; on timeout it is abandoned (yfinance
+    calls cannot be cancelled) and SymbolTimeout is raised to the caller.
+    """
+    if not timeout:
+        return fn(symbol)
+
+    box = {}
+
+    def target():
+        try:
+            box["result"] = fn(symbol)
+        except BaseException as e:  # re-raised in the caller thread
+            box["error"] = e
+
+    t = threading.Thread(target=target, name=f"fetch-{symbol}", daemon=True)
+    t.start()
+    t.join(timeout)
+    if t.is_alive():
+        raise SymbolTimeout(f"timed out after {timeout}s")
+    if "error" in box:
+        raise box["error"]
+    return box.get("result")
+
+
+def call_with_policy(fn, symbol, timeout=None, retries=0, backoff=None, stage="fetch"):
+    """Call fn(symbol) with per-attempt timeout and retries.
+
+    Returns (result, error): error is the last exception if every attempt
+    failed, otherwise None. The outcome (ok / timeout / failed), retries and
+    wall time are recorded in metrics under `stage`, per symbol as well.
+    """
+    if backoff is None:
+        backoff = config.FETCH_BACKOFF
+
+    t0 = time.perf_counter()
+    result, last_err = None, None
+    for attempt in range(int(retries) + 1):
+        if attempt:
+            metrics.count("symbol_retries", stage=stage)
+            if backoff:
+                time.sleep(backoff * (2 ** (attempt - 1)))
+        try:
+            result, last_err = _call_with_timeout(fn, symbol, timeout), None
+            break
+        except Exception as e:
+            last_err = e
+
+    elapsed = time.perf_counter() - t0
+    if last_err is None:
+        outcome = "ok"
+    else:
+        outcome = "timeout" if isinstance(last_err, SymbolTimeout) else "failed"
+    metrics.record(f"symbol_{stage}", elapsed)
+    metrics.count("symbol_calls", stage=stage, outcome=outcome)
+    metrics.note_symbol(symbol, **{f"{stage}_s": round(elapsed, 4), f"{stage}_outcome": outcome})
+    if last_err is not None:
+        metrics.note_symbol(symbol, **{f"{stage}_error": f"{type(last_err).__name__}: {last_err}"})
+    return result, last_err
+
+
+def map_symbols(fn, symbols, workers=None, timeout=None, retries=None, stage="fetch", on_result=None):
+    """Apply fn to every symbol on a bounded worker pool.
+
+    Returns a list of (symbol, result, error) in the same order as `symbols`,
+    so callers can consume it exactly like the old sequential loop and get
+    identical output regardless of completion order. on_result(symbol,
+    result, error) is called for each symbol as soon as it and every
+    symbol before it are done, e.g. to checkpoint progress.
+    """
+    workers = config.FETCH_WORKERS if workers is None else workers
+    timeout = config.FETCH_TIMEOUT if timeout is None else timeout
+    retries = config.FETCH_RETRIES if retries is None else retries
+    symbols = list(symbols)
+
+    def run(sym):
+        return call_with_policy(fn, sym, timeout=timeout, retries=retries, stage=stage)
+
+    out = []
+
+    def collect(sym, outcome):
+        res, err = outcome
+        if on_result is not None:
+            on_result(sym, res, err)
+        out.append((sym, res, err))
+
+    if workers <= 1 or len(symbols) <= 1:
+        for sym in symbols:
+            collect(sym, run(sym))
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(symbols))) as pool:
+            for sym, outcome in zip(symbols, pool.map(run, symbols)):
+                collect(sym, outcome)
+    return out
@@ -0,0 +1,268 @@
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+import metrics
+
+
+# per-symbol scalar columns kept for every run (NaN when not fetched/computed)
+SCALAR_COLUMNS = [
+    "price",
+    "trailing_eps_ttm",
+    "latest_div_year",
+    "latest_div_amt",
+    "latest_news_ts",
+    "base_q_eps",
+    "next_q_eps_est",
+    "next_year_eps_est",
+    "avg_payout_ratio",
+    "est_dividend",
+    "est_yield_%",
+]
+
+_TS_FORMAT = "%Y%m%d_%H%M%S_%f"
+_COMPACT = "compact"  # history/compact_<YYYYMM>_<last run stamp>.npz
+
+
+class HistoryStore:
+    """Append-only, versioned archive of every fetched snapshot.
+
+    Each run writes one compressed NumPy archive, history/<mode>_<ts>.npz,
+    holding column arrays for the scanned symbols:
+      - symbols, plus the SCALAR_COLUMNS (inputs, trigger fields, yield row)
+      - div_years / dividends: symbol x year dividend matrix
+      - eps_q: symbol x quarter EPS matrix (most recent first)
+    Nothing is overwritten, so past yields and inputs can be queried, and
+    re-scored through analyzer.YieldInputs, without refetching.
+
+    Only the newest HISTORY_KEEP_RUNS runs stay in their own archive: once
+    there are twice as many, append() folds the older ones into one
+    archive per month, history/compact_<YYYYMM>_<last run>.npz (see
+    compact()), so the number of files load() opens stays bounded.
+    Compacted runs keep their scalar rows; their input matrices are
+    dropped (load_inputs needs a per-run archive).
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root if root is not None else config.HISTORY_DIR)
+
+    @metrics.timed("history_append")
+    def append(self, mode: str, symbols, scalars: pd.DataFrame = None, inputs=None, ts: datetime = None):
+        """Archive one run.
+
+        - scalars: DataFrame indexed by symbol with any of SCALAR_COLUMNS
+        - inputs:  analyzer.YieldInputs for the symbols whose inputs were fetched
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return None
+        ts = ts or datetime.now()
+
+        arrays = {"symbols": np.array(symbols, dtype=str), "fetched_at": np.array(ts.timestamp())}
+
+        scalars = scalars if scalars is not None else pd.DataFrame(index=symbols)
+        scalars = scalars.reindex(symbols)
+        for col in SCALAR_COLUMNS:
+            if col in scalars.columns:
+                arrays[col] = pd.to_numeric(scalars[col], errors="coerce").to_numpy(dtype=float)
+            else:
+                arrays[col] = np.full(len(symbols), np.nan)
+
+        if inputs is not None:
+            divs = inputs.dividends.reindex(symbols)
+            divs = divs.reindex(columns=sorted(divs.columns))
+            arrays["div_years"] = np.asarray(divs.columns, dtype=np.int32)
+            arrays["dividends"] = divs.to_numpy(dtype=float)
+            arrays["eps_q"] = inputs.eps_q.reindex(symbols).to_numpy(dtype=float)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{mode}_{ts.strftime(_TS_FORMAT)}.npz"
+        np.savez_compressed(path, **arrays)
+
+        keep = config.HISTORY_KEEP_RUNS
+        if len(self.runs()) > 2 * keep:
+            self.compact(keep)
+        return path
+
+    def runs(self, since: datetime = None, until: datetime = None):
+        """[(ts, mode, path)] of the per-run archives, oldest first."""
+        out = []
+        if not self.root.exists():
+            return out
+        for path in self.root.glob("*.npz"):
+            mode, _, stamp = path.stem.partition("_")
+            if mode == _COMPACT:
+                continue
+            try:
+                ts = datetime.strptime(stamp, _TS_FORMAT)
+            except ValueError:
+                continue
+            if since is not None and ts < since:
+                continue
+            if until is not None and ts > until:
+                continue
+            out.append((ts, mode, path))
+        out.sort(key=lambda r: r[0])
+        return out
+
+    def compacted(self):
+        """[(month 'YYYYMM', path)] of the monthly archives, oldest first."""
+        if not self.root.exists():
+            return []
+        return sorted((path.stem.split("_")[1], path) for path in self.root.glob(f"{_COMPACT}_*.npz"))
+
+    @staticmethod
+    def _run_rows(path, ts, mode) -> pd.DataFrame:
+        """Scalar rows of one per-run archive, with run_ts / mode columns."""
+        with np.load(path) as z:
+            df = pd.DataFrame({col: z[col] for col in SCALAR_COLUMNS if col in z.files})
+            df.insert(0, "symbol", z["symbols"])
+        df.insert(0, "mode", mode)
+        df.insert(0, "run_ts", ts)
+        return df
+
+    @staticmethod
+    def _compacted_rows(path):
+        """(scalar rows with run_ts / mode columns, names of the runs folded in) of one monthly archive."""
+        with np.load(path) as z:
+            df = pd.DataFrame({col: z[col] for col in SCALAR_COLUMNS if col in z.files})
+            df.insert(0, "symbol", z["symbols"])
+            df.insert(0, "mode", z["mode"])
+            df.insert(0, "run_ts", pd.to_datetime(z["run_stamp"], format=_TS_FORMAT))
+            folded = set(z["runs"].tolist())
+        return df, folded
+
+    @metrics.timed("history_compact")
+    def compact(self, keep_runs=None) -> int:
+        """Fold all but the newest `keep_runs` per-run archives into monthly archives.
+
+        Each month's runs are merged with that month's existing archive
+        into a new one, written before the folded files are removed.
+        Returns the number of runs folded.
+        """
+        keep = config.HISTORY_KEEP_RUNS if keep_runs is None else keep_runs
+        runs = self.runs()
+        old = runs[:max(len(runs) - max(keep, 0), 0)]
+        if not old:
+            return 0
+        by_month = {}
+        for ts, mode, path in old:
+            by_month.setdefault(ts.strftime("%Y%m"), []).append((ts, mode, path))
+        existing = {}
+        for month, path in self.compacted():
+            existing.setdefault(month, []).append(path)
+
+        for month, month_runs in by_month.items():
+            frames, folded = [], set()
+            for path in existing.get(month, []):
+                df, names = self._compacted_rows(path)
+                frames.append(df)
+                folded |= names
+            for ts, mode, path in month_runs:
+                if path.stem not in folded:
+                    frames.append(self._run_rows(path, ts, mode))
+                    folded.add(path.stem)
+            table = pd.concat(frames, ignore_index=True).sort_values("run_ts", kind="stable")
+
+            arrays = {
+                "run_stamp": np.array([ts.strftime(_TS_FORMAT) for ts in table["run_ts"]], dtype=str),
+                "mode": table["mode"].to_numpy(dtype=str),
+                "symbols": table["symbol"].to_numpy(dtype=str),
+                "runs": np.array(sorted(folded), dtype=str),
+            }
+            for col in SCALAR_COLUMNS:
+                arrays[col] = table[col].to_numpy(dtype=float) if col in table else np.full(len(table), np.nan)
+            target = self.root / f"{_COMPACT}_{month}_{month_runs[-1][0].strftime(_TS_FORMAT)}.npz"
+            tmp = target.with_suffix(".partial")
+            with open(tmp, "wb") as fh:
+                np.savez_compressed(fh, **arrays)
+            os.replace(tmp, target)
+
+            for path in existing.get(month, []):
+                if path != target:
+                    path.unlink(missing_ok=True)
+            for _, _, path in month_runs:
+                path.unlink(missing_ok=True)
+        metrics.count("history_runs_compacted", len(old))
+        return len(old)
+
+    def load(self, symbols=None, since: datetime = None, until: datetime = None) -> pd.DataFrame:
+        """Long table of scalar history: one row per (run, symbol), oldest run first."""
+        wanted = set(symbols) if symbols is not None else None
+        frames = []
+        folded = set()
+        for month, path in self.compacted():
+            if (since is not None and month < since.strftime("%Y%m")) or (
+                until is not None and month > until.strftime("%Y%m")
+            ):
+                continue
+            df, names = self._compacted_rows(path)
+            folded |= names
+            if since is not None:
+                df = df[df["run_ts"] >= since]
+            if until is not None:
+                df = df[df["run_ts"] <= until]
+            frames.append(df)
+        for ts, mode, path in self.runs(since, until):
+            if path.stem not in folded:  # already in a monthly archive (interrupted compaction)
+                frames.append(self._run_rows(path, ts, mode))
+        if wanted is not None:
+            frames = [df[df["symbol"].isin(wanted)] for df in frames]
+        frames = [df for df in frames if not df.empty]
+
+        if not frames:
+            return pd.DataFrame(columns=["run_ts", "mode", "symbol"] + SCALAR_COLUMNS)
+        out = pd.concat(frames, ignore_index=True)
+        if len(frames) > 1:
+            out = out.sort_values("run_ts", kind="stable").reset_index(drop=True)
+        return out
+
+    def as_of(self, symbol: str, when: datetime):
+        """Latest archived row for `symbol` at or before `when`, or None."""
+        df = self.load([symbol], until=when)
+        df = df[df["est_yield_%"].notna()] if "est_yield_%" in df else df
+        if df.empty:
+            return None
+        return df.iloc[-1].to_dict()
+
+    def latest(self, symbols=None) -> dict:
+        """{symbol: latest archived row}, e.g. as a previous snapshot for trigger checks."""
+        df = self.load(symbols)
+        if df.empty:
+            return {}
+        last = df.groupby("symbol", sort=False).tail(1)
+        return {row["symbol"]: row for row in last.to_dict("records")}
+
+    def load_inputs(self, path):
+        """Rebuild analyzer.YieldInputs from one archive (for offline re-scoring)."""
+        from analyzer import YieldInputs
+
+        with np.load(path) as z:
+            if "dividends" not in z.files:
+                return None
+            symbols = list(z["symbols"])
+            base = pd.DataFrame({"price": z["price"], "eps_ttm": z["trailing_eps_ttm"]}, index=symbols)
+            dividends = pd.DataFrame(
+                z["dividends"], index=symbols, columns=[int(y) for y in z["div_years"]]
+            )
+            eps_q = pd.DataFrame(z["eps_q"], index=symbols)
+        return YieldInputs.from_frames(base, dividends, eps_q)
+
+
+def history_mode(symbols):
+    """Print the archived price / estimated-yield trail of each symbol."""
+    df = HistoryStore().load(symbols)
+    df = df[df["est_yield_%"].notna()]
+    if df.empty:
+        print("(no archived yields for these symbols)")
+        return df
+
+    cols = ["run_ts", "mode", "price", "est_dividend", "est_yield_%"]
+    for sym, group in df.groupby("symbol", sort=False):
+        print(f"\n=== {sym} ===")
+        print(group[cols].to_string(index=False))
+    return df
@@ -0,0 +1,229 @@
+"""Per-symbol dependency graph over the computed yield fields.
+
+    input / node        depends on
+    next_q_eps_est      statements, eps_ttm (trailingEps/4 fallback)
+    avg_payout_ratio    dividends, eps_ttm
+    est_dividend        next_q_eps_est, avg_payout_ratio
+    est_yield           price, est_dividend
+
+The computed nodes are cached in the symbol's state row (StateStore). A
+trigger reason marks the inputs it changed; only the nodes downstream of
+those are recomputed, the rest come from the cache. A dividend change
+recomputes the payout ratio from the dividends the trigger scan already
+fetched (no statement fetch); a news item or a new price only redoes the
+est_dividend / price arithmetic, with no fetch at all.
+
+price_crossings() / reprice() do the price-only case for a whole batch
+of symbols at once, from the prices of one bulk quote request.
+"""
+import numpy as np
+import pandas as pd
+
+import metrics
+from analyzer import YIELD_COLUMNS, YieldInputs, payout_basis, yield_columns, yield_nodes
+
+
+INPUTS = ("price", "eps_ttm", "dividends", "statements")
+
+GRAPH = {
+    "next_q_eps_est": ("statements", "eps_ttm"),
+    "avg_payout_ratio": ("dividends", "eps_ttm"),
+    "est_dividend": ("next_q_eps_est", "avg_payout_ratio"),
+    "est_yield": ("price", "est_dividend"),
+}
+
+# nodes kept in the state DB (est_yield is always recomputed from the current price)
+CACHED_NODES = ("next_q_eps_est", "avg_payout_ratio", "est_dividend")
+# state fields written by node_values()
+STATE_FIELDS = ("price", *CACHED_NODES, "payout_basis")
+
+# trigger reason prefix (see trigger_engine.detect_triggers) -> inputs it changed
+REASON_INPUTS = {
+    "EPS": ("eps_ttm", "statements"),
+    "Dividend": ("dividends",),
+    "New news": (),
+    "News": (),
+    "Price": ("price",),
+}
+
+
+def reason_inputs(reasons) -> set:
+    """Inputs changed by these trigger reasons; an unknown reason changes everything."""
+    changed = set()
+    for reason in reasons:
+        prefix = next((p for p in REASON_INPUTS if reason.startswith(p)), None)
+        if prefix is None:
+            return set(INPUTS)
+        changed.update(REASON_INPUTS[prefix])
+    return changed
+
+
+def affected(changed) -> set:
+    """Every node downstream of the `changed` inputs / nodes."""
+    dirty = set()
+    grew = True
+    while grew:
+        grew = False
+        for node, deps in GRAPH.items():
+            if node not in dirty and any(d in changed or d in dirty for d in deps):
+                dirty.add(node)
+                grew = True
+    return dirty
+
+
+def plan(prev: dict, reasons, years_for_payout: int, as_of_year=None):
+    """Nodes to recompute for a triggered symbol, or None for a full recompute.
+
+    Full when the state has no usable cache (never computed, or computed
+    for another payout window / year), or when next_q_eps_est is dirty
+    (that needs the statements anyway, so nothing would be saved). A
+    cached None is a computed NaN (e.g. no payout history), not a miss;
+    a cache without a price was written for a record that never got past
+    the price check, and is ignored.
+    """
+    prev = prev or {}
+    if prev.get("payout_basis") != payout_basis(years_for_payout, as_of_year) or not prev.get("price"):
+        return None
+    dirty = affected(reason_inputs(reasons) | {"price"})  # the bulk quote is always fresh
+    if "next_q_eps_est" in dirty:
+        return None
+    return dirty
+
+
+def recompute_row(symbol: str, prev: dict, dirty, price, div_events=None, years_for_payout=None,
+                  as_of_year=None):
+    """(row dict or None, nodes) for one symbol from its cached nodes.
+
+    `prev` is the symbol's state (trailing_eps_ttm and the cached nodes);
+    `div_events` (dividend_events of the scan snapshot) is only read when
+    avg_payout_ratio is dirty. The row has the YIELD_COLUMNS layout, None
+    when the symbol has no valid yield, same as compute_yield_table.
+    """
+    eps_ttm = prev.get("trailing_eps_ttm")
+    next_q = prev["next_q_eps_est"]
+    payout = prev["avg_payout_ratio"]
+    if "avg_payout_ratio" in dirty:
+        record = {"symbol": symbol, "price": price, "eps_ttm": eps_ttm, "div_events": div_events, "eps_q": None}
+        payout = yield_nodes(YieldInputs([record]), years_for_payout, as_of_year)["avg_payout_ratio"].iloc[0]
+
+    nodes = node_values(next_q, payout, price, years_for_payout, as_of_year)
+    return _row(symbol, price, eps_ttm, next_q, payout), nodes
+
+
+def _row(symbol: str, price, eps_ttm, next_q_eps_est, payout):
+    """One symbol's YIELD_COLUMNS row (yield_columns), None when it has no valid yield."""
+    if not price or eps_ttm is None or not eps_ttm > 0 or payout is None or pd.isna(payout):
+        return None
+    columns = yield_columns([price], [eps_ttm], [next_q_eps_est], [payout])
+    return {"symbol": symbol, **{col: float(values[0]) for col, values in columns.items()}}
+
+
+def node_values(next_q_eps_est, payout, price, years_for_payout: int, as_of_year=None) -> dict:
+    """State fields caching one symbol's computed nodes."""
+    def clean(v):
+        return None if v is None or pd.isna(v) else float(v)
+
+    next_q_eps_est, payout = clean(next_q_eps_est), clean(payout)
+    est_dividend = None if next_q_eps_est is None or payout is None else next_q_eps_est * 4.0 * payout
+    return {
+        "price": clean(price),
+        "next_q_eps_est": next_q_eps_est,
+        "avg_payout_ratio": payout,
+        "est_dividend": est_dividend,
+        "payout_basis": payout_basis(years_for_payout, as_of_year),
+    }
+
+
+def record_nodes(record: dict, years_for_payout: int, as_of_year=None) -> dict:
+    """node_values() of a full collect_yield_inputs record.
+
+    {} for a record that stopped early (no price or no positive
+    trailingEps): its statements and dividends were never read, so there
+    is nothing to cache, and a cache would let plan() skip the full
+    recompute the symbol still needs.
+    """
+    eps_ttm = record.get("eps_ttm")
+    if not record.get("price") or not eps_ttm or eps_ttm <= 0:
+        return {}
+    nodes = yield_nodes(YieldInputs([record]), years_for_payout, as_of_year).iloc[0]
+    return node_values(nodes["next_q_eps_est"], nodes["avg_payout_ratio"], record.get("price"),
+                       years_for_payout, as_of_year)
+
+
+def record_row(record: dict, years_for_payout: int, as_of_year=None):
+    """(row dict or None, nodes) of a full collect_yield_inputs record.
+
+    The row is compute_yield_table's row for the record, straight from
+    yield_columns (no table); nodes are record_nodes(). Cheap enough for
+    the recalc worker thread.
+    """
+    nodes = record_nodes(record, years_for_payout, as_of_year)
+    if not nodes:
+        return None, nodes
+    row = _row(record["symbol"], record["price"], record["eps_ttm"], nodes["next_q_eps_est"],
+               nodes["avg_payout_ratio"])
+    return row, nodes
+
+
+def _state_column(symbols, state: dict, field: str):
+    return np.array([(state.get(sym) or {}).get(field) for sym in symbols], dtype=float)
+
+
+@metrics.timed("price_crossings")
+def price_crossings(symbols, prices: dict, state: dict, yield_threshold: float, years_for_payout: int,
+                    as_of_year=None) -> dict:
+    """{symbol: [reason]} for symbols whose price moved across the yield threshold.
+
+    Each symbol's breakeven price is the stored est_dividend / threshold
+    (yield >= threshold <=> price <= breakeven); a symbol crossed when its
+    stored price and its current price are on different sides. One
+    vectorized pass over every symbol with a current price and a valid
+    cache (see plan()); no per-symbol fetch.
+    """
+    basis = payout_basis(years_for_payout, as_of_year)
+    symbols = [
+        sym for sym in dict.fromkeys(symbols)
+        if prices.get(sym) and (state.get(sym) or {}).get("payout_basis") == basis
+    ]
+    if not symbols:
+        return {}
+    est_dividend = _state_column(symbols, state, "est_dividend")
+    before = _state_column(symbols, state, "price")
+    now = np.array([prices[sym] for sym in symbols], dtype=float)
+
+    breakeven = est_dividend / float(yield_threshold)
+    with np.errstate(invalid="ignore"):
+        known = (est_dividend > 0) & (before > 0) & (now > 0)
+        crossed = known & ((before <= breakeven) != (now <= breakeven))
+
+    threshold_pct = float(yield_threshold) * 100.0
+    out = {}
+    for i in np.flatnonzero(crossed):
+        direction = "below" if now[i] <= breakeven[i] else "above"
+        out[symbols[i]] = [
+            f"Price crossed {direction} {threshold_pct:g}% yield breakeven {breakeven[i]:.2f}: "
+            f"{before[i]:g} -> {now[i]:g}"
+        ]
+    return out
+
+
+def reprice(symbols, prices: dict, state: dict) -> pd.DataFrame:
+    """YIELD_COLUMNS rows of symbols whose only new input is the price, in one vectorized pass.
+
+    Uses the cached nodes in `state` and stores the new price there (the
+    reference for the next price_crossings). Invalid rows are dropped,
+    as in compute_yield_table.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    price = np.array([prices[sym] for sym in symbols], dtype=float)
+    eps_ttm = _state_column(symbols, state, "trailing_eps_ttm")
+    payout = _state_column(symbols, state, "avg_payout_ratio")
+    table = pd.DataFrame(
+        {"symbol": symbols, **yield_columns(price, eps_ttm, _state_column(symbols, state, "next_q_eps_est"), payout)},
+        columns=YIELD_COLUMNS,
+    )
+    for sym, p in zip(symbols, price):
+        state[sym]["price"] = float(p)
+    with np.errstate(invalid="ignore"):
+        valid = (price > 0) & (eps_ttm > 0) & ~np.isnan(payout)
+    return table[valid].reset_index(drop=True)
@@ -1,7 +1,9 @@
 import argparse
 import config
-from analyzer import yield_mode
-from trigger_engine import event_mode
+
+# Everything else (pandas, numpy, yfinance via the data modules) is imported
+# inside main() on the path that needs it, so --help and argument errors stay
+# fast; see `python bench.py --startup`.
 
 
 def parse_args():
@@ -10,15 +12,26 @@ def parse_args():
     )
     p.add_argument(
         "--mode",
-        choices=["yield", "event"],
+        choices=["yield", "event", "daemon", "serve", "history", "backtest", "universe", "merge"],
         default="event",
-        help="yield: compute for all symbols; event: detect updates and recalc only triggered symbols",
+        help="yield: compute for all symbols; event: detect updates and recalc only triggered symbols; "
+        "daemon: keep running event scans on a per-tier schedule; "
+        "serve: daemon + local HTTP/JSON queries over the latest yields; "
+        "history: show archived yields for --symbols; backtest: replay the yield screen point-in-time; "
+        "universe: show the symbol registry; merge: combine --shards N shard outputs",
     )
     p.add_argument(
         "--symbols",
         type=str,
         default="",
-        help="Optional comma-separated symbols, e.g., 2330.TW,2317.TW",
+        help="Optional comma-separated symbols, e.g., 2330.TW,2317.TW (default: active symbols in the universe registry)",
+    )
+    p.add_argument("--sector", type=str, default="", help="Comma-separated sectors from universe.csv, e.g. financials")
+    p.add_argument("--market", type=str, default="", help="Comma-separated markets: TW (TWSE), TWO (TPEx)")
+    p.add_argument(
+        "--include-inactive",
+        action="store_true",
+        help="Also run symbols the registry marked inactive (no quote for DELIST_AFTER_FAILURES days)",
     )
     p.add_argument("--years", type=int, default=config.YEARS_FOR_PAYOUT, help="Years for payout ratio averaging")
     p.add_argument(
@@ -27,24 +40,206 @@ def parse_args():
         default=config.YIELD_THRESHOLD,
         help="Yield threshold (e.g., 0.06 for 6%%)",
     )
+    p.add_argument(
+        "--scenarios",
+        type=str,
+        default="",
+        help="(yield/event) extra EPS scenarios as columns: labels from config.EPS_SCENARIOS, "
+        "estimator names (sma3, wma4, trend, seasonal, p10..p90) or 'all'",
+    )
     p.add_argument(
         "--force-all",
         action="store_true",
         help="(event mode) force recalculation for all symbols this run",
     )
+    p.add_argument(
+        "--held",
+        type=str,
+        default="",
+        help="(daemon/serve) comma-separated held symbols, fully re-checked (EPS, dividends, news) on every "
+        "fast-tier tick (default: config.HELD_SYMBOLS)",
+    )
+    p.add_argument("--once", action="store_true", help="(daemon) run every tier once and exit")
+    p.add_argument("--host", type=str, default=config.SERVE_HOST, help="(serve) bind address")
+    p.add_argument("--port", type=int, default=config.SERVE_PORT, help="(serve) port, 0 = any free port")
+    p.add_argument(
+        "--shard",
+        type=str,
+        default="",
+        help="(yield/event) run only shard i of N, e.g. 2/4; outputs go to shards/<i>of<N>/",
+    )
+    p.add_argument("--shards", type=int, default=0, help="(merge) number of shards to combine")
+    p.add_argument(
+        "--resume",
+        action="store_true",
+        help="(yield/event) continue an interrupted run over the same symbols from its checkpoint",
+    )
+    p.add_argument(
+        "--no-probe",
+        action="store_true",
+        help="(event mode) skip the batched change probe and fully fetch every symbol",
+    )
+    p.add_argument(
+        "--probe-max-age",
+        type=float,
+        default=config.PROBE_MAX_AGE_DAYS,
+        help="(event/daemon/serve) days between full re-checks of a symbol whose probe is unchanged; "
+        "the probe only sees price and ex-dividend changes, so a trailingEps or news change can be "
+        "picked up this many days late (0 = full check every run; daemon tiers may set their own)",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=config.FETCH_WORKERS,
+        help="Concurrent per-symbol fetch workers (1 = sequential)",
+    )
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=config.FETCH_TIMEOUT,
+        help="Per-symbol fetch timeout in seconds (0 = no timeout)",
+    )
+    p.add_argument(
+        "--retries",
+        type=int,
+        default=config.FETCH_RETRIES,
+        help="Retries per symbol after a failed or timed-out fetch",
+    )
+    p.add_argument("--start", type=str, default="", help="(backtest) first rebalance date, e.g. 2016-01-01")
+    p.add_argument("--end", type=str, default="", help="(backtest) last date of price data")
+    p.add_argument(
+        "--freq",
+        type=str,
+        default=config.BACKTEST_FREQ,
+        help="(backtest) rebalance frequency as a pandas offset alias, e.g. ME or QE",
+    )
+    p.add_argument(
+        "--source",
+        choices=["live", "record", "replay", "synthetic"],
+        default="live",
+        help="live: yfinance; record: yfinance + save responses to --fixtures; replay: serve --fixtures offline; "
+        "synthetic: generated deterministic data",
+    )
+    p.add_argument("--fixtures", type=str, default=str(config.FIXTURES_DIR), help="Fixture directory for record/replay")
+    p.add_argument("--replay-latency", type=float, default=0.0, help="(replay/synthetic) mean simulated latency per call, seconds")
+    p.add_argument("--replay-error-rate", type=float, default=0.0, help="(replay) fraction of calls that fail")
+    p.add_argument("--seed", type=int, default=0, help="(replay/synthetic) seed for simulated errors / generated data")
+    p.add_argument(
+        "--metrics-out",
+        type=str,
+        default="",
+        help="Write run telemetry (counters, stage histograms, per-symbol latency/outcome) here: "
+        "Prometheus text for *.prom, otherwise appended JSON lines",
+    )
+    p.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached yfinance payloads and re-download everything (cache is rewritten)",
+    )
     return p.parse_args()
 
 
 def main():
     args = parse_args()
-    symbols = config.SYMBOLS
+
+    from data_fetcher import set_cache, set_source
+    from data_sources import make_source
+    from payload_cache import PayloadCache
+
+    set_source(make_source(args.source, args.fixtures, latency=args.replay_latency,
+                           error_rate=args.replay_error_rate, seed=args.seed))
+    # record must see every real response and replay must only serve
+    # fixtures, so the payload cache is only used against live yfinance
+    cache = None
+    if args.source == "live":
+        memory = config.CACHE_MEMORY_ENTRIES if args.mode in ("daemon", "serve") else 0
+        cache = PayloadCache(config.CACHE_DIR, refresh=args.refresh, memory_entries=memory)
+    set_cache(cache)
+
+    sectors = [s.strip() for s in args.sector.split(",") if s.strip()]
+    markets = [s.strip() for s in args.market.split(",") if s.strip()]
+    if args.mode == "universe":
+        from universe import universe_mode
+        universe_mode(sector=sectors, market=markets)
+        return
+    if args.mode == "merge":
+        if args.shards < 1:
+            raise SystemExit("--mode merge needs --shards N")
+        from sharding import merge_shards
+        merge_shards(args.shards, args.threshold)
+        return
+
     if args.symbols.strip():
         symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    else:
+        from universe import select_symbols
+        symbols = select_symbols(sector=sectors, market=markets, include_inactive=args.include_inactive)
+        if not symbols:
+            raise SystemExit(f"no symbols selected (universe: {config.UNIVERSE_FILE}, {config.UNIVERSE_DB})")
+
+    shard = None
+    if args.shard:
+        if args.mode not in ("yield", "event"):
+            raise SystemExit("--shard only applies to --mode yield / event")
+        from sharding import enter_shard, parse_shard, select_shard
+        try:
+            i, n = parse_shard(args.shard)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        symbols = select_shard(symbols, i, n)
+        shard = (i, n, enter_shard(i, n, symbols))
+        print(f"[SHARD] {i}/{n}: {len(symbols)} symbols -> {shard[2]}")
+
+    try:
+        result = run_mode(args, symbols)
+        if shard and result is not None:
+            from sharding import write_partial
+            write_partial(shard[2], args.mode, result[0], shard[0], shard[1], symbols)
+    finally:
+        if args.metrics_out:
+            import metrics
+            path = metrics.export(args.metrics_out, mode=args.mode, source=args.source)
+            print(f"[METRICS] {path}")
+
+
+def run_mode(args, symbols):
+    scenarios = [s for s in args.scenarios.split(",") if s.strip()] or None
+    if scenarios:
+        from estimators import resolve
+        try:
+            scenarios = resolve(scenarios)
+        except ValueError as e:
+            raise SystemExit(str(e))
 
-    if args.mode == "yield":
-        yield_mode(symbols, args.years, args.threshold)
+    if args.mode == "history":
+        from history import history_mode
+        history_mode(symbols)
+    elif args.mode == "daemon":
+        from daemon import daemon_mode
+        held = [s.strip() for s in args.held.split(",") if s.strip()] or None
+        daemon_mode(symbols, args.years, args.threshold, held=held, workers=args.workers, timeout=args.timeout,
+                    retries=args.retries, probe=not args.no_probe, once=args.once,
+                    probe_max_age_days=args.probe_max_age)
+    elif args.mode == "serve":
+        from query_service import serve_mode
+        held = [s.strip() for s in args.held.split(",") if s.strip()] or None
+        serve_mode(symbols, args.years, args.threshold, held=held, host=args.host, port=args.port,
+                   workers=args.workers, timeout=args.timeout, retries=args.retries, probe=not args.no_probe,
+                   probe_max_age_days=args.probe_max_age)
+    elif args.mode == "backtest":
+        from backtest import backtest_mode
+        backtest_mode(symbols, args.years, args.threshold, start=args.start or None, end=args.end or None,
+                      freq=args.freq, workers=args.workers, timeout=args.timeout, retries=args.retries)
+    elif args.mode == "yield":
+        from analyzer import yield_mode
+        return yield_mode(symbols, args.years, args.threshold, workers=args.workers, timeout=args.timeout,
+                   retries=args.retries, checkpoint=True, resume=args.resume, scenarios=scenarios)
     else:
-        event_mode(symbols, args.years, args.threshold, force_recalc_all=args.force_all)
+        from trigger_engine import event_mode
+        return event_mode(symbols, args.years, args.threshold, force_recalc_all=args.force_all,
+                   workers=args.workers, timeout=args.timeout, retries=args.retries,
+                   probe=not args.no_probe, probe_max_age_days=args.probe_max_age, checkpoint=True,
+                   resume=args.resume, scenarios=scenarios)
 
 
 if __name__ == "__main__":
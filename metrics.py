@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+
+_lock = threading.Lock()
+_samples = {}  # stage -> [seconds, ...]
+_counters = {}  # (name, ((label, value), ...)) -> count
+_symbols = {}  # symbol -> {field: value}, e.g. fetch_s, outcome, skip_reason
+
+# Prometheus histogram buckets for stage timings, seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "stock_selector"
+
+
+def record(stage: str, seconds: float):
+    with _lock:
+        _samples.setdefault(stage, []).append(seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the wall time of the enclosed block under `stage`."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - t0)
+
+
+def count(name: str, n=1, **labels):
+    """Add n to the counter `name` for this label set (e.g. outcome="ok")."""
+    if not n:
+        return
+    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+def note_symbol(symbol: str, **fields):
+    """Attach per-symbol facts (latency, outcome, skip reason) to this run."""
+    with _lock:
+        _symbols.setdefault(symbol, {}).update(fields)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _counters.clear()
+        _symbols.clear()
+
+
+def counter_summary() -> dict:
+    """{"name{label=value,...}": count} over everything counted."""
+    with _lock:
+        items = sorted(_counters.items())
+    out = {}
+    for (name, labels), value in items:
+        tag = ",".join(f"{k}={v}" for k, v in labels)
+        out[f"{name}{{{tag}}}" if tag else name] = value
+    return out
+
+
+def symbol_summary() -> dict:
+    with _lock:
+        return {sym: dict(fields) for sym, fields in sorted(_symbols.items())}
+
+
+def stage_summary(percentiles=(50, 90, 99)) -> dict:
+    """{stage: {count, total_s, p50_ms, ..., max_ms}} over everything recorded."""
+    with _lock:
+        samples = {k: list(v) for k, v in _samples.items()}
+
+    out = {}
+    for stage, values in sorted(samples.items()):
+        arr = np.asarray(values) * 1000.0
+        row = {"count": int(arr.size), "total_s": round(float(arr.sum()) / 1000.0, 4)}
+        for p, v in zip(percentiles, np.percentile(arr, percentiles)):
+            row[f"p{p}_ms"] = round(float(v), 3)
+        row["max_ms"] = round(float(arr.max()), 3)
+        out[stage] = row
+    return out
+
+
+def export_jsonl(path, **meta):
+    """Append this run's counters, stage timings and per-symbol facts as JSON lines."""
+    ts = datetime.now(timezone.utc).isoformat()
+    with _lock:
+        counters = sorted(_counters.items())
+    lines = []
+    for (name, labels), value in counters:
+        lines.append({"type": "counter", "name": name, "labels": dict(labels), "value": value})
+    for stage, row in stage_summary().items():
+        lines.append({"type": "stage", "stage": stage, **row})
+    for sym, fields in symbol_summary().items():
+        lines.append({"type": "symbol", "symbol": sym, **fields})
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps({"ts": ts, **meta, **line}, ensure_ascii=False, default=str) + "\n")
+    return len(lines)
+
+
+def _prom_labels(labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+    return "{" + body + "}"
+
+
+def prometheus_text() -> str:
+    """Counters and stage-time histograms in the Prometheus text format.
+
+    Per-symbol facts are left out (one series per ticker is too much
+    cardinality for a scrape); use export_jsonl for those.
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        samples = {k: np.asarray(v) for k, v in _samples.items()}
+
+    out = []
+    seen = set()
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}_{name}_total"
+        if metric not in seen:
+            out.append(f"# TYPE {metric} counter")
+            seen.add(metric)
+        out.append(f"{metric}{_prom_labels(labels)} {value:g}")
+
+    metric = f"{PREFIX}_stage_seconds"
+    if samples:
+        out.append(f"# TYPE {metric} histogram")
+    for stage, arr in sorted(samples.items()):
+        counts = np.searchsorted(np.sort(arr), BUCKETS, side="right")
+        for le, n in zip(BUCKETS, counts):
+            out.append(f'{metric}_bucket{{stage="{stage}",le="{le:g}"}} {int(n)}')
+        out.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {arr.size}')
+        out.append(f'{metric}_sum{{stage="{stage}"}} {float(arr.sum()):.6f}')
+        out.append(f'{metric}_count{{stage="{stage}"}} {arr.size}')
+    return "\n".join(out) + "\n"
+
+
+def export(path, **meta):
+    """Write telemetry to `path`: Prometheus text for *.prom, JSON lines otherwise."""
+    path = Path(path)
+    if path.suffix == ".prom":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(prometheus_text(), encoding="utf-8")
+    else:
+        export_jsonl(path, **meta)
+    return path
@@ -0,0 +1,155 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import config
+
+
+def _is_cacheable(value) -> bool:
+    # None / {} are what yfinance hands back on a failed request; keep them
+    # out of the cache so the next run retries instead of reusing a miss.
+    if value is None:
+        return False
+    if isinstance(value, dict) and not value:
+        return False
+    return True
+
+
+class PayloadCache:
+    """On-disk cache of yfinance payloads keyed by (symbol, field).
+
+    Layout: <root>/<field>/<symbol>.pkl, each file holding (fetched_at, value).
+    Every field has its own TTL (config.CACHE_TTL). Reads touch the file so
+    mtime tracks last use, and once the directory exceeds max_bytes the least
+    recently used files are evicted. refresh=True skips reads but still
+    writes, i.e. forces a full re-download that repopulates the cache.
+
+    memory_entries > 0 adds an in-process LRU layer in front of the disk,
+    for long-running processes (--mode daemon) that would otherwise
+    unpickle the same payloads on every tick.
+    """
+
+    def __init__(self, root=None, ttl=None, max_bytes=None, refresh=False, memory_entries=0):
+        self.root = Path(root if root is not None else config.CACHE_DIR)
+        self.ttl = dict(config.CACHE_TTL if ttl is None else ttl)
+        self.max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk, computed lazily
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()  # (symbol, field) -> (fetched_at, value)
+
+    def _expired(self, field: str, fetched_at: float) -> bool:
+        ttl = self.ttl.get(field)
+        return ttl is not None and time.time() - fetched_at > ttl
+
+    def _remember(self, key, fetched_at, value):
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = (fetched_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, symbol: str, field: str) -> Path:
+        return self.root / field / f"{symbol}.pkl"
+
+    def get(self, symbol: str, field: str):
+        """Return (hit, value). Expired, unreadable or refreshed entries miss."""
+        if self.refresh:
+            return False, None
+
+        key = (symbol, field)
+        if self.memory_entries:
+            with self._lock:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+            if entry is not None and not self._expired(field, entry[0]):
+                return True, entry[1]
+
+        path = self._path(symbol, field)
+        try:
+            with path.open("rb") as f:
+                fetched_at, value = pickle.load(f)
+        except Exception:
+            return False, None
+
+        if self._expired(field, fetched_at):
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember(key, fetched_at, value)
+        return True, value
+
+    def put(self, symbol: str, field: str, value):
+        if not _is_cacheable(value):
+            return
+        path = self._path(symbol, field)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        old_size = path.stat().st_size if path.exists() else 0
+        fetched_at = time.time()
+        self._remember((symbol, field), fetched_at, value)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((fetched_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)  # atomic: readers never see a partial file
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += path.stat().st_size - old_size
+            if self.max_bytes and self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        if not self.root.exists():
+            return []
+        return [p for p in self.root.glob("*/*.pkl") if p.is_file()]
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self._files())
+
+    def _evict(self):
+        """Drop least recently used files until under 90% of max_bytes."""
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for p in self._files():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(key=lambda e: e[0])
+
+        size = sum(e[1] for e in entries)
+        for _mtime, nbytes, p in entries:
+            if size <= target:
+                break
+            try:
+                p.unlink()
+                size -= nbytes
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self):
+        for p in self._files():
+            p.unlink(missing_ok=True)
+        with self._lock:
+            self._size = 0
+            self._memory.clear()
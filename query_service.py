@@ -0,0 +1,192 @@
+import json
+import math
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import config
+from analyzer import YIELD_COLUMNS
+from history import HistoryStore
+
+
+def _clean(value):
+    """JSON-safe scalar: NaN/inf -> None, numpy scalars -> Python."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return value
+
+
+class YieldIndex:
+    """Latest estimated yield per symbol, ranked in memory.
+
+    Rows are the YIELD_COLUMNS of compute_yield_table plus "reasons" (the
+    trigger reasons of the run that produced them), "updated_at" and
+    "origin" ("history" or the daemon tier). The ranking is rebuilt once
+    per update, so top-N and threshold queries are a slice of a list.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._ranked = []  # symbols, est_yield_% descending
+        self._neg_yields = []  # -est_yield_% in the same order, for bisect
+        self._rank = {}
+        self.updated_at = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, df, reasons=None, origin="event", when=None, covered=None):
+        """Merge rows from a yield table (DataFrame with YIELD_COLUMNS).
+
+        `covered` are the symbols the run recalculated: those without a
+        valid row in `df` no longer have a yield and are removed.
+        """
+        has_rows = df is not None and not df.empty
+        if not has_rows and not covered:
+            return 0
+        when = when or datetime.now()
+        reasons = reasons or {}
+        fresh = {}
+        for row in (df.to_dict("records") if has_rows else []):
+            sym = row["symbol"]
+            if _clean(row.get("est_yield_%")) is None:
+                continue
+            item = {col: _clean(row.get(col)) for col in YIELD_COLUMNS}
+            item["reasons"] = list(reasons.get(sym, []))
+            item["updated_at"] = _clean(row.get("run_ts", when))
+            item["origin"] = origin
+            fresh[sym] = item
+
+        with self._lock:
+            for sym in covered or ():
+                if sym not in fresh:
+                    self._rows.pop(sym, None)
+            self._rows.update(fresh)
+            ranked = sorted(self._rows.values(), key=lambda r: r["est_yield_%"], reverse=True)
+            self._ranked = [r["symbol"] for r in ranked]
+            self._neg_yields = [-r["est_yield_%"] for r in ranked]
+            self._rank = {sym: i + 1 for i, sym in enumerate(self._ranked)}
+            self.updated_at = when
+        return len(fresh)
+
+    def load_history(self, store=None, symbols=None):
+        """Seed the index from the latest archived yield of each symbol."""
+        df = (store or HistoryStore()).load(symbols)
+        if df.empty:
+            return 0
+        df = df[df["est_yield_%"].notna()]
+        last = df.groupby("symbol", sort=False).tail(1)
+        when = last["run_ts"].max() if not last.empty else None
+        return self.update(last, origin="history", when=when)
+
+    def top(self, n=20):
+        with self._lock:
+            return [self._rows[s] for s in self._ranked[:max(int(n), 0)]]
+
+    def above(self, min_yield_pct):
+        """Rows with est_yield_% >= min_yield_pct, best first."""
+        with self._lock:
+            k = bisect_right(self._neg_yields, -float(min_yield_pct))
+            return [self._rows[s] for s in self._ranked[:k]]
+
+    def get(self, symbol):
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                return None
+            return {**row, "rank": self._rank[symbol]}
+
+    def on_daemon_run(self, tier_name, df_trig, df_high):
+        """EventDaemon listener: fold each tier's recalculated rows in (and drop symbols left without one)."""
+        self.update(df_trig, reasons=df_trig.attrs.get("trigger_reasons"), origin=tier_name,
+                    covered=df_trig.attrs.get("recalculated"))
+
+
+def make_handler(index, default_threshold):
+    default_pct = float(default_threshold) * 100.0
+
+    class Handler(BaseHTTPRequestHandler):
+        """GET /top?n=20, /yields?min=6, /symbols/<sym>, /health."""
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            parts = [p for p in url.path.split("/") if p]
+            try:
+                if parts == ["top"]:
+                    rows = index.top(int(query.get("n", 20)))
+                    self._send(200, {"count": len(rows), "rows": rows})
+                elif parts == ["yields"]:
+                    min_pct = float(query.get("min", default_pct))
+                    rows = index.above(min_pct)
+                    self._send(200, {"min_yield_%": min_pct, "count": len(rows), "rows": rows})
+                elif len(parts) == 2 and parts[0] == "symbols":
+                    row = index.get(parts[1])
+                    if row is None:
+                        self._send(404, {"error": f"no yield for {parts[1]}"})
+                    else:
+                        self._send(200, row)
+                elif parts in ([], ["health"]):
+                    self._send(200, {"symbols": len(index), "updated_at": _clean(index.updated_at)})
+                else:
+                    self._send(404, {"error": f"unknown path {url.path}"})
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+
+        def log_message(self, fmt, *args):
+            pass  # keep the daemon's console output readable
+
+    return Handler
+
+
+def start_server(index, host=None, port=None, default_threshold=None):
+    """Serve `index` on a background thread; returns the server."""
+    host = host or config.SERVE_HOST
+    port = config.SERVE_PORT if port is None else port
+    handler = make_handler(index, config.YIELD_THRESHOLD if default_threshold is None else default_threshold)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="query-service", daemon=True).start()
+    return server
+
+
+def serve_mode(symbols, years_for_payout, yield_threshold, held=None, host=None, port=None, workers=None,
+               timeout=None, retries=None, probe=True, probe_max_age_days=None):
+    """Run the event daemon and answer yield queries over local HTTP/JSON.
+
+    The index starts from the history archive, so it answers right away,
+    and is refreshed by every tier run of the daemon.
+    """
+    from daemon import EventDaemon, build_tiers
+
+    index = YieldIndex()
+    n = index.load_history(symbols=symbols)
+    server = start_server(index, host, port, yield_threshold)
+    addr, bound_port = server.server_address[:2]
+    print(f"[SERVE] http://{addr}:{bound_port}/ ({n} symbols from history)", flush=True)
+
+    tiers = build_tiers(symbols, held, probe_max_age_days=probe_max_age_days)
+    daemon = EventDaemon(tiers, years_for_payout, yield_threshold, workers=workers, timeout=timeout,
+                         retries=retries, probe=probe)
+    daemon.listeners.append(index.on_daemon_run)
+    try:
+        daemon.run()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return index
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+
+import config
+import metrics
+
+
+class RateLimited(Exception):
+    """Yahoo kept answering 429 after every retry."""
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """429s surface as yfinance's YFRateLimitError or as HTTP errors mentioning it."""
+    text = f"{type(exc).__name__}: {exc}"
+    return "RateLimit" in text or "429" in text or "Too Many Requests" in text
+
+
+class RequestGovernor:
+    """Shared throttle for every request to Yahoo.
+
+    - token bucket: at most `rate` requests/s on average, bursts of `burst`
+    - AIMD: each success raises the rate by `increase` (up to max_rate),
+      a throttled response halves it (down to min_rate), at most once a
+      second so a burst of failures from one throttling episode counts once
+    - throttled: a 429 / rate-limit error, or an empty response within
+      `throttle_memory` seconds of one (Yahoo sometimes answers a throttled
+      client with an empty payload). Otherwise an empty response is a
+      plain miss, e.g. a delisted ticker: returned at once, no retry.
+    - backoff: a throttled call is retried after base * 2**attempt seconds
+      (capped at backoff_max), at most `retries` times
+    - circuit breaker: when the failure rate (throttled responses and any
+      other request error) over the last `window` calls reaches
+      `error_rate`, every caller pauses for `cooldown` seconds. The
+      breaker is then half-open: the first outcome after the pause closes
+      it, or re-opens it if it is another failure.
+
+    `clock` / `sleep` default to time.monotonic / time.sleep.
+    Thread-safe; one instance is shared by all fetch workers.
+    """
+
+    def __init__(self, rate=None, burst=None, min_rate=None, max_rate=None, increase=None, retries=None,
+                 backoff=None, backoff_max=None, window=None, error_rate=None, cooldown=None,
+                 throttle_memory=None, clock=None, sleep=None):
+        self.rate = float(rate if rate is not None else config.RATE_LIMIT)
+        self.burst = float(burst if burst is not None else config.RATE_BURST)
+        self.min_rate = float(min_rate if min_rate is not None else config.RATE_MIN)
+        self.max_rate = float(max_rate if max_rate is not None else config.RATE_MAX)
+        self.increase = float(increase if increase is not None else config.RATE_INCREASE)
+        self.retries = int(retries if retries is not None else config.RATE_RETRIES)
+        self.backoff = float(backoff if backoff is not None else config.RATE_BACKOFF)
+        self.backoff_max = float(backoff_max if backoff_max is not None else config.RATE_BACKOFF_MAX)
+        self.window = int(window if window is not None else config.BREAKER_WINDOW)
+        self.error_rate = float(error_rate if error_rate is not None else config.BREAKER_ERROR_RATE)
+        self.cooldown = float(cooldown if cooldown is not None else config.BREAKER_COOLDOWN)
+        self.throttle_memory = float(
+            throttle_memory if throttle_memory is not None else config.RATE_THROTTLE_MEMORY
+        )
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or time.sleep
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._stamp = self._clock()
+        self._outcomes = deque(maxlen=self.window)
+        self._open_until = 0.0
+        self._half_open = False
+        self._last_decrease = float("-inf")
+        self._last_throttled = float("-inf")
+        self.stats = {"calls": 0, "throttled": 0, "empty": 0, "missing": 0, "errors": 0, "retries": 0,
+                      "breaker_trips": 0}
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._clock() < self._open_until
+
+    def acquire(self):
+        """Block until the breaker is closed and a token is available."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if now < self._open_until:
+                    wait = self._open_until - now
+                elif self._tokens >= 1.0 - 1e-9:  # refill rounding must not leave a never-ending tiny wait
+                    self._tokens -= 1.0
+                    self.stats["calls"] += 1
+                    break
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+        if waited:
+            metrics.record("rate_wait", waited)
+
+    def _observe(self, ok: bool, kind=None):
+        """Record one call outcome. kind: None (ok), "throttled", "empty" (throttled) or "errors"."""
+        with self._lock:
+            self._outcomes.append(ok)
+            if kind:
+                self.stats[kind] += 1
+            metrics.count("yahoo_requests", outcome=kind or "ok")
+            now = self._clock()
+            if ok:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+                if now >= self._open_until:
+                    self._half_open = False
+                return
+            if kind != "errors":
+                self._last_throttled = now
+                if now - self._last_decrease >= 1.0:
+                    self.rate = max(self.min_rate, self.rate / 2.0)
+                    self._last_decrease = now
+            failures = self._outcomes.count(False)
+            seen = len(self._outcomes)
+            # half-open: the first failure after the pause (not one still in flight from before) re-trips
+            retrip = self._half_open and now >= self._open_until
+            if retrip or (seen >= self.window // 2 and failures / seen >= self.error_rate):
+                self._open_until = now + self.cooldown
+                self._half_open = True
+                self._outcomes.clear()
+                self._tokens = 0.0
+                self.stats["breaker_trips"] += 1
+                metrics.count("breaker_trips")
+                print(f"[RATE] {failures} failed responses in the last {seen} calls, "
+                      f"pausing requests for {self.cooldown:g}s (rate now {self.rate:.2f}/s)", flush=True)
+
+    def _throttled_recently(self) -> bool:
+        with self._lock:
+            return self._clock() - self._last_throttled < self.throttle_memory
+
+    def call(self, fn, is_empty=None):
+        """Run fn() under the limiter, retrying throttled responses.
+
+        An empty result is a throttled response only right after a 429
+        (see throttle_memory); one that survives every retry is returned
+        as is, as is any other empty result (the callers already handle
+        a missing payload). A 429 that survives every retry raises
+        RateLimited; other errors are counted by the breaker and re-raised.
+        """
+        for attempt in range(self.retries + 1):
+            self.acquire()
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    self._observe(False, "errors")
+                    raise
+                self._observe(False, "throttled")
+                if attempt == self.retries:
+                    raise RateLimited(str(e)) from e
+            else:
+                if is_empty is None or not is_empty(result):
+                    self._observe(True)
+                    return result
+                if not self._throttled_recently():
+                    with self._lock:
+                        self.stats["missing"] += 1
+                    metrics.count("yahoo_requests", outcome="missing")
+                    return result
+                self._observe(False, "empty")
+                if attempt == self.retries:
+                    return result
+            with self._lock:
+                self.stats["retries"] += 1
+            self._sleep(min(self.backoff_max, self.backoff * 2 ** attempt))
@@ -0,0 +1,161 @@
+"""Split a run across processes or machines with --shard i/N, then merge.
+
+Symbol -> shard is crc32(symbol) % N, so every node computes the same
+partition with no coordination, and a symbol stays on its shard as the
+universe grows. A shard keeps its own state, history, checkpoints and
+results under shards/<i>of<N>/ and writes its full yield table there.
+Copy the shard directories onto one machine and run --mode merge to get
+the ranked table over the whole universe and fold every shard's state
+and history back into the main state DB / history archive.
+"""
+import json
+import shutil
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+
+def parse_shard(text: str):
+    """'2/4' -> (2, 4); shards are numbered 1..N."""
+    try:
+        i, n = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard must look like i/N, got {text!r}") from None
+    if not 1 <= i <= n:
+        raise ValueError(f"--shard {text}: need 1 <= i <= N")
+    return i, n
+
+
+def shard_of(symbol: str, n: int) -> int:
+    """1-based shard of `symbol` among n shards (stable across processes)."""
+    return zlib.crc32(symbol.encode("utf-8")) % n + 1
+
+
+def select_shard(symbols, i: int, n: int) -> list:
+    return [sym for sym in symbols if shard_of(sym, n) == i]
+
+
+def shard_dir(i: int, n: int, root=None) -> Path:
+    return Path(root if root is not None else config.SHARD_DIR) / f"{i}of{n}"
+
+
+def enter_shard(i: int, n: int, symbols, root=None) -> Path:
+    """Point state / history / checkpoints / results at this shard's directory.
+
+    A new shard state DB is seeded with its symbols' rows from the main
+    state DB, so switching an existing setup to sharding does not re-trigger
+    everything.
+    """
+    from state_store import StateStore
+
+    base = shard_dir(i, n, root)
+    base.mkdir(parents=True, exist_ok=True)
+    main_db = Path(config.STATE_DB)
+    shard_db = base / "state.db"
+    seed = not shard_db.exists() and main_db.exists()
+
+    config.STATE_DB = shard_db
+    config.STATE_FILE = base / "state.json"  # no legacy import per shard
+    config.HISTORY_DIR = base / "history"
+    config.CHECKPOINT_DIR = base / "checkpoints"
+    config.RESULT_DIR = base / "result"
+
+    if seed:
+        src, dst = StateStore(main_db, legacy_json=False), StateStore(shard_db, legacy_json=False)
+        try:
+            dst.upsert_many(src.get(symbols))
+        finally:
+            src.close()
+            dst.close()
+    return base
+
+
+def write_partial(base: Path, mode: str, table, i: int, n: int, symbols):
+    """Save this shard's full yield table plus a small manifest for merge."""
+    table.to_csv(base / f"{mode}_table.csv", index=False, encoding="utf-8-sig")
+    manifest = {
+        "shard": i,
+        "of": n,
+        "mode": mode,
+        "symbols": len(symbols),
+        "rows": int(len(table)),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    (base / f"{mode}_manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def merge_shards(n: int, yield_threshold: float, root=None):
+    """Combine shards/*of<n>/ into one ranked table per mode, one state DB and one history.
+
+    Returns {mode: merged table}.
+    """
+    import pandas as pd
+    from analyzer import YIELD_COLUMNS
+    from state_store import StateStore
+
+    bases = [shard_dir(i, n, root) for i in range(1, n + 1)]
+    missing = [b.name for b in bases if not b.exists()]
+    if missing:
+        print(f"[MERGE] missing shard directories: {', '.join(missing)} (merging the rest)")
+    bases = [b for b in bases if b.exists()]
+    if not bases:
+        print(f"[MERGE] nothing to merge under {shard_dir(1, n, root).parent}")
+        return {}
+
+    threshold_pct = float(yield_threshold) * 100.0
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    merged = {}
+    for mode in ("yield", "event"):
+        parts = [b / f"{mode}_table.csv" for b in bases if (b / f"{mode}_table.csv").exists()]
+        if not parts:
+            continue
+        df = pd.concat([pd.read_csv(p, encoding="utf-8-sig") for p in parts], ignore_index=True)
+        extra = [c for c in df.columns if c not in YIELD_COLUMNS]  # e.g. --scenarios columns
+        df = df.reindex(columns=YIELD_COLUMNS + extra).drop_duplicates("symbol", keep="last")
+        # ties ranked by symbol so the merged order does not depend on shard order
+        df = df.sort_values(["est_yield_%", "symbol"], ascending=[False, True]).reset_index(drop=True)
+        merged[mode] = df
+
+        config.RESULT_DIR.mkdir(parents=True, exist_ok=True)
+        out_all = config.RESULT_DIR / f"merged_{mode}_all_{ts}.csv"
+        out_high = config.RESULT_DIR / f"merged_{mode}_high_yield_{int(threshold_pct)}pct_{ts}.csv"
+        df.to_csv(out_all, index=False, encoding="utf-8-sig")
+        high = df[df["est_yield_%"] >= threshold_pct]
+        high.to_csv(out_high, index=False, encoding="utf-8-sig")
+        print(f"[MERGE] {mode}: {len(parts)}/{n} shards, {len(df)} rows, {len(high)} >= {threshold_pct:g}% -> {out_high}")
+
+    store = StateStore()
+    try:
+        rows = 0
+        for b in bases:
+            db = b / "state.db"
+            if not db.exists():
+                continue
+            try:
+                shard_store = StateStore(db, legacy_json=False)
+            except sqlite3.Error as e:
+                print(f"[MERGE] skipping {db}: {e}")
+                continue
+            try:
+                state = shard_store.get()
+            finally:
+                shard_store.close()
+            store.upsert_many(state)
+            rows += len(state)
+        print(f"[MERGE] state: {rows} symbols -> {store.path}")
+    finally:
+        store.close()
+
+    copied = 0
+    for b in bases:
+        for npz in sorted((b / "history").glob("*.npz")):
+            target = Path(config.HISTORY_DIR) / npz.name
+            if not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(npz, target)
+                copied += 1
+    print(f"[MERGE] history: {copied} new archives -> {config.HISTORY_DIR}")
+    return merged
@@ -0,0 +1,102 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import config
+
+
+class StateStore:
+    """Per-symbol trigger state in SQLite.
+
+    Replaces the whole-file state.json rewrite: reads are indexed lookups
+    for just the requested symbols, writes are per-symbol upserts committed
+    in one transaction, so a crash leaves the previous state intact instead
+    of a truncated file. On first open an existing state.json is imported.
+    """
+
+    # column name -> SQLite type; new columns are added to old databases on open
+    COLUMNS = {
+        "trailing_eps_ttm": "REAL",
+        "latest_div_year": "INTEGER",
+        "latest_div_amt": "REAL",
+        "latest_news_ts": "INTEGER",
+        "probe": "TEXT",
+        # cached computed fields, see incremental.py
+        "price": "REAL",
+        "next_q_eps_est": "REAL",
+        "avg_payout_ratio": "REAL",
+        "est_dividend": "REAL",
+        "payout_basis": "TEXT",
+        "full_checked_at": "TEXT",
+        "updated_at": "TEXT",
+    }
+
+    def __init__(self, path=None, legacy_json=None):
+        self.path = Path(path if path is not None else config.STATE_DB)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+        legacy_json = config.STATE_FILE if legacy_json is None else legacy_json
+        if legacy_json and Path(legacy_json).exists() and self.count() == 0:
+            self.migrate_json(legacy_json)
+
+    def _ensure_schema(self):
+        cols = ", ".join(f"{name} {typ}" for name, typ in self.COLUMNS.items())
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS symbol_state (symbol TEXT PRIMARY KEY, {cols})")
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(symbol_state)")}
+            for name, typ in self.COLUMNS.items():
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE symbol_state ADD COLUMN {name} {typ}")
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM symbol_state").fetchone()[0]
+
+    def get(self, symbols=None) -> dict:
+        """Return {symbol: {column: value}} for `symbols` (all rows if None)."""
+        names = list(self.COLUMNS)
+        select = f"SELECT symbol, {', '.join(names)} FROM symbol_state"
+
+        if symbols is None:
+            rows = self.conn.execute(select).fetchall()
+        else:
+            symbols = list(dict.fromkeys(symbols))
+            rows = []
+            # stay under SQLite's bound-parameter limit
+            for i in range(0, len(symbols), 500):
+                chunk = symbols[i:i + 500]
+                marks = ", ".join("?" * len(chunk))
+                rows.extend(self.conn.execute(f"{select} WHERE symbol IN ({marks})", chunk).fetchall())
+
+        return {row[0]: dict(zip(names, row[1:])) for row in rows}
+
+    def upsert_many(self, state: dict):
+        """Insert or update every symbol in `state` atomically."""
+        if not state:
+            return
+        names = list(self.COLUMNS)
+        sql = (
+            f"INSERT INTO symbol_state (symbol, {', '.join(names)}) "
+            f"VALUES (?, {', '.join('?' * len(names))}) "
+            f"ON CONFLICT(symbol) DO UPDATE SET "
+            + ", ".join(f"{n}=excluded.{n}" for n in names)
+        )
+        params = [(sym, *(row.get(n) for n in names)) for sym, row in state.items()]
+        with self.conn:
+            self.conn.executemany(sql, params)
+
+    def migrate_json(self, path):
+        """Import a legacy state.json. A corrupt file raises instead of
+        silently starting from empty state (which would re-trigger everything)."""
+        path = Path(path)
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            raise RuntimeError(f"cannot migrate {path}: {e}") from e
+        self.upsert_many(state)
+        print(f"[INFO] migrated {len(state)} symbols from {path} to {self.path}")
+
+    def close(self):
+        self.conn.close()
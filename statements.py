@@ -0,0 +1,235 @@
+"""Quarterly income statements, normalized once into a local SQLite table.
+
+yfinance hands back a wide statement frame whose net income row label
+varies by version and filer, and only the last ~5 quarters of it. Each
+symbol's statement is parsed once into fixed-schema rows
+
+    quarterly_statement(symbol, quarter_end, net_income, shares, eps)
+
+and merged into statements.db (config.STATEMENT_DB): a re-fetch updates
+the quarters it returns (restatements win) and keeps older ones, so the
+table grows beyond Yahoo's window. EPS estimation reads from here and
+only re-fetches a statement when a new quarter can have been published
+(quarter end + 3 months + REPORT_LAG_DAYS) or the stored copy is older
+than STATEMENT_MAX_AGE_DAYS.
+"""
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+import config
+import metrics
+from data_fetcher import get_shares_outstanding
+
+
+# yfinance's label for the net income row varies
+NET_INCOME_ROWS = (
+    "Net Income",
+    "NetIncome",
+    "Net Income Common Stockholders",
+    "Net Income Continuous Operations",
+)
+
+
+def quarterly_statement(tk):
+    """tk.quarterly_income_stmt, falling back to quarterly_financials; None if neither has data."""
+    for field in ("quarterly_income_stmt", "quarterly_financials"):  # the latter: older yfinance
+        try:
+            stmt = getattr(tk, field)
+        except Exception:
+            stmt = None
+        if stmt is not None and not getattr(stmt, "empty", True):
+            return stmt
+    return None
+
+
+@metrics.timed("statement_parse")
+def normalize_statement(stmt, shares) -> list:
+    """[(quarter_end 'YYYY-MM-DD', net_income, shares, eps)] in the statement's column order."""
+    label = next((key for key in NET_INCOME_ROWS if key in stmt.index), None)
+    if label is None:
+        return []
+    net_incomes = stmt.loc[label].dropna()
+    rows = []
+    for quarter_end, net_income in net_incomes.items():
+        try:
+            quarter_end = pd.Timestamp(quarter_end).date().isoformat()
+        except (TypeError, ValueError):
+            continue
+        net_income = float(net_income)
+        rows.append((quarter_end, net_income, shares, net_income / shares))
+    return rows
+
+
+def statement_rows(tk) -> list:
+    """Normalized statement rows for one ticker / SymbolSnapshot ([] when unavailable).
+
+    EPS = quarterly net income / sharesOutstanding (from tk.info); without
+    shares the statement is not fetched at all.
+    """
+    shares = get_shares_outstanding(tk)
+    if not shares:
+        return []
+    stmt = quarterly_statement(tk)
+    if stmt is None:
+        return []
+    return normalize_statement(stmt, shares)
+
+
+class StatementStore:
+    """Normalized quarterly statements, one row per (symbol, quarter_end).
+
+    statement_checks remembers when each symbol's statement was last
+    fetched (even when Yahoo had none), so due() can tell which symbols
+    actually need a fetch. Not thread-safe: callers read before and merge
+    after a worker pass, on the main thread.
+    """
+
+    COLUMNS = {
+        "net_income": "REAL",
+        "shares": "REAL",
+        "eps": "REAL",
+        "ingested_at": "TEXT",
+    }
+
+    def __init__(self, path=None):
+        self.path = Path(path if path is not None else config.STATEMENT_DB)
+        # shards on one machine share this cache
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        cols = ", ".join(f"{name} {typ}" for name, typ in self.COLUMNS.items())
+        with self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS quarterly_statement "
+                f"(symbol TEXT NOT NULL, quarter_end TEXT NOT NULL, {cols}, PRIMARY KEY (symbol, quarter_end))"
+            )
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(quarterly_statement)")}
+            for name, typ in self.COLUMNS.items():
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE quarterly_statement ADD COLUMN {name} {typ}")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS statement_checks (symbol TEXT PRIMARY KEY, checked_at TEXT, quarters INTEGER)"
+            )
+
+    def _select(self, sql, symbols):
+        """Run `sql` (with a {marks} placeholder) over `symbols` in bound-parameter-sized chunks."""
+        symbols = list(dict.fromkeys(symbols))
+        rows = []
+        for i in range(0, len(symbols), 500):
+            chunk = symbols[i:i + 500]
+            rows.extend(self.conn.execute(sql.format(marks=", ".join("?" * len(chunk))), chunk).fetchall())
+        return rows
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM quarterly_statement").fetchone()[0]
+
+    def merge(self, rows_by_symbol: dict, now=None) -> int:
+        """Upsert {symbol: statement_rows(...)} and mark those symbols checked.
+
+        Quarters already stored are overwritten (restated figures win);
+        quarters missing from the new fetch are kept. Returns the number of
+        quarters that were not stored before.
+        """
+        if not rows_by_symbol:
+            return 0
+        now = (now or datetime.now()).isoformat(timespec="seconds")
+        before = self.count()
+        params = [
+            (sym, quarter_end, net_income, shares, eps, now)
+            for sym, rows in rows_by_symbol.items()
+            for quarter_end, net_income, shares, eps in rows or ()
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO quarterly_statement (symbol, quarter_end, net_income, shares, eps, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(symbol, quarter_end) DO UPDATE SET "
+                "net_income=excluded.net_income, shares=excluded.shares, eps=excluded.eps, "
+                "ingested_at=excluded.ingested_at",
+                params,
+            )
+            self.conn.executemany(
+                "INSERT INTO statement_checks (symbol, checked_at, quarters) VALUES (?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET checked_at=excluded.checked_at, quarters=excluded.quarters",
+                [(sym, now, len(rows or ())) for sym, rows in rows_by_symbol.items()],
+            )
+        added = self.count() - before
+        metrics.count("statement_quarters", added, outcome="new")
+        metrics.count("statement_quarters", len(params) - added, outcome="refreshed")
+        return added
+
+    def due(self, symbols, today=None, recheck_days=None, max_age_days=None) -> list:
+        """Symbols whose statement should be (re-)fetched, in input order.
+
+        Due when never checked, or - at most once per recheck_days - when a
+        quarter after the latest stored one can have been published, or
+        the last check is older than max_age_days.
+        """
+        today = today or date.today()
+        recheck = timedelta(days=config.STATEMENT_RECHECK_DAYS if recheck_days is None else recheck_days)
+        max_age = timedelta(days=config.STATEMENT_MAX_AGE_DAYS if max_age_days is None else max_age_days)
+        next_report = timedelta(days=91 + config.REPORT_LAG_DAYS)
+
+        checks = {
+            sym: (checked_at, latest)
+            for sym, checked_at, latest in self._select(
+                "SELECT c.symbol, c.checked_at, MAX(q.quarter_end) FROM statement_checks c "
+                "LEFT JOIN quarterly_statement q ON q.symbol = c.symbol "
+                "WHERE c.symbol IN ({marks}) GROUP BY c.symbol",
+                symbols,
+            )
+        }
+        out = []
+        for sym in dict.fromkeys(symbols):
+            if sym not in checks:
+                out.append(sym)
+                continue
+            checked_at, latest = checks[sym]
+            try:
+                checked = datetime.fromisoformat(checked_at).date()
+            except (TypeError, ValueError):
+                out.append(sym)
+                continue
+            if today - checked < recheck:
+                continue
+            if latest is None or date.fromisoformat(latest) + next_report <= today or today - checked >= max_age:
+                out.append(sym)
+        return out
+
+    def eps_series(self, symbols) -> dict:
+        """{symbol: [eps, ...]} most recent quarter first, for symbols with stored quarters."""
+        out = {}
+        for sym, eps in self._select(
+            "SELECT symbol, eps FROM quarterly_statement WHERE symbol IN ({marks}) AND eps IS NOT NULL "
+            "ORDER BY symbol, quarter_end DESC",
+            symbols,
+        ):
+            out.setdefault(sym, []).append(eps)
+        return out
+
+    def fresh_eps(self, symbols) -> dict:
+        """{symbol: eps list (possibly empty)} for the symbols that are not due()."""
+        due = set(self.due(symbols))
+        fresh = [sym for sym in dict.fromkeys(symbols) if sym not in due]
+        stored = self.eps_series(fresh)
+        return {sym: stored.get(sym, []) for sym in fresh}
+
+    def eps_frame(self, symbols) -> pd.DataFrame:
+        """quarter_end x symbol matrix of stored quarter EPS (ascending dates)."""
+        rows = self._select(
+            "SELECT quarter_end, symbol, eps FROM quarterly_statement WHERE symbol IN ({marks}) AND eps IS NOT NULL",
+            symbols,
+        )
+        if not rows:
+            return pd.DataFrame(columns=list(dict.fromkeys(symbols)))
+        long = pd.DataFrame(rows, columns=["quarter_end", "symbol", "eps"])
+        long["quarter_end"] = pd.to_datetime(long["quarter_end"])
+        return long.pivot(index="quarter_end", columns="symbol", values="eps").sort_index()
+
+    def close(self):
+        self.conn.close()
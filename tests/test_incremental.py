@@ -0,0 +1,118 @@
+"""incremental.py against compute_yield_table, on SyntheticSource payloads.
+
+The incremental paths (cached nodes + recompute_row, price_crossings +
+reprice) must give the rows a full recompute gives for the same inputs.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import incremental
+from analyzer import YieldInputs, collect_yield_inputs, compute_yield_table, yield_nodes
+from data_fetcher import SymbolSnapshot
+from data_sources import SyntheticSource
+
+
+YEARS = 5
+THRESHOLD = 0.06
+SYMBOLS = [f"{code}.TW" for code in range(1101, 1201)]
+
+
+def full_table(records) -> pd.DataFrame:
+    return compute_yield_table(YieldInputs(records), YEARS, record_skips=False).set_index("symbol")
+
+
+def state_of(records) -> dict:
+    """State rows as event mode leaves them after a full recompute."""
+    return {
+        r["symbol"]: {"trailing_eps_ttm": r["eps_ttm"], **incremental.record_nodes(r, YEARS)}
+        for r in records
+    }
+
+
+@pytest.fixture(scope="module")
+def records():
+    source = SyntheticSource(seed=7)
+    return [collect_yield_inputs(sym, SymbolSnapshot(sym, source=source)) for sym in SYMBOLS]
+
+
+@pytest.fixture(scope="module")
+def valid(records):
+    symbols = list(full_table(records).index)
+    assert len(symbols) > 20
+    return symbols
+
+
+def test_plan(records, valid):
+    state = state_of(records)
+    prev = state[valid[0]]
+    assert incremental.plan({}, ["News"], YEARS) is None
+    assert incremental.plan(prev, ["EPS changed: 1.0 -> 2.0"], YEARS) is None
+    assert incremental.plan(prev, ["News"], YEARS + 1) is None
+    assert incremental.plan({**prev, "price": None}, ["News"], YEARS) is None
+    assert incremental.plan(prev, ["New news: 1 -> 2"], YEARS) == {"est_yield"}
+    assert incremental.plan(prev, ["Dividend changed"], YEARS) == {"avg_payout_ratio", "est_dividend", "est_yield"}
+
+    stopped = [r for r in records if not r["eps_ttm"] or r["eps_ttm"] <= 0]
+    assert stopped
+    assert incremental.plan(state[stopped[0]["symbol"]], ["News"], YEARS) is None
+
+
+def test_record_row_matches_full_table(records, valid):
+    expected = full_table(records)
+    for record in records:
+        row, nodes = incremental.record_row(record, YEARS)
+        sym = record["symbol"]
+        assert row == ({"symbol": sym, **expected.loc[sym].to_dict()} if sym in valid else None), sym
+        assert nodes == incremental.record_nodes(record, YEARS)
+
+
+def test_recompute_row_matches_full_table(records, valid):
+    expected = full_table(records)
+    state = state_of(records)
+    by_symbol = {r["symbol"]: r for r in records}
+
+    # cache written before the dividends changed: the payout ratio is recomputed
+    stale = [
+        {**r, "div_events": (r["div_events"][0], r["div_events"][1] * 2.0)} if r["div_events"] is not None else r
+        for r in records
+    ]
+    stale_state = state_of(stale)
+
+    for sym in valid:
+        price = by_symbol[sym]["price"]
+        for prev, reason in ((state[sym], "New news: 1 -> 2"), (stale_state[sym], "Dividend changed")):
+            dirty = incremental.plan(prev, [reason], YEARS)
+            row, nodes = incremental.recompute_row(sym, prev, dirty, price, by_symbol[sym]["div_events"], YEARS)
+            assert row is not None
+            assert row == {"symbol": sym, **expected.loc[sym].to_dict()}, (sym, reason)
+            assert nodes == incremental.record_nodes(by_symbol[sym], YEARS)
+
+
+def test_price_crossings_and_reprice(records, valid):
+    state = state_of(records)
+    moves = np.where(np.arange(len(SYMBOLS)) % 2 == 0, 0.5, 2.0)
+    prices = {r["symbol"]: round(r["price"] * m, 2) for r, m in zip(records, moves)}
+    moved = [{**r, "price": prices[r["symbol"]]} for r in records]
+
+    nodes = yield_nodes(YieldInputs(records), YEARS)
+    est_dividend = nodes["next_q_eps_est"] * 4.0 * nodes["avg_payout_ratio"]
+    expected_crossed = {
+        sym for sym in valid
+        if est_dividend[sym] > 0
+        and (est_dividend[sym] / state[sym]["price"] >= THRESHOLD) != (est_dividend[sym] / prices[sym] >= THRESHOLD)
+    }
+    assert expected_crossed
+
+    crossed = incremental.price_crossings(SYMBOLS, prices, state, THRESHOLD, YEARS)
+    assert set(crossed) == expected_crossed
+
+    table = incremental.reprice(SYMBOLS, prices, state).set_index("symbol")
+    pd.testing.assert_frame_equal(table, full_table(moved))
+    assert all(state[sym]["price"] == prices[sym] for sym in SYMBOLS)
+    assert incremental.price_crossings(SYMBOLS, prices, state, THRESHOLD, YEARS) == {}
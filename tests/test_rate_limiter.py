@@ -0,0 +1,154 @@
+"""RequestGovernor (token bucket, AIMD, circuit breaker) and GovernedSource, on a fake clock."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_sources import DataSource, GovernedSource
+from rate_limiter import RateLimited, RequestGovernor
+
+
+class FakeClock:
+    """monotonic() that only moves when the governor sleeps (or a test advances it)."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def governor(clock, **kwargs):
+    params = dict(rate=2.0, burst=2, min_rate=0.5, max_rate=4.0, increase=0.25, retries=2, backoff=1.0,
+                  backoff_max=30.0, window=4, error_rate=0.5, cooldown=60.0, throttle_memory=30.0)
+    params.update(kwargs)
+    return RequestGovernor(clock=clock, sleep=clock.sleep, **params)
+
+
+def throttle():
+    raise RuntimeError("429 Client Error: Too Many Requests")
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    gov = governor(clock)
+    gov.acquire()
+    gov.acquire()
+    assert clock.sleeps == []  # the burst is free
+    for _ in range(4):
+        gov.acquire()
+    assert clock.now - 1000.0 == pytest.approx(4 / gov.rate)
+    assert gov.stats["calls"] == 6
+
+
+def test_aimd_halves_on_throttling_once_a_second_and_recovers():
+    clock = FakeClock()
+    gov = governor(clock, retries=0, window=100)
+    with pytest.raises(RateLimited):
+        gov.call(throttle)
+    assert gov.rate == 1.0
+    with pytest.raises(RateLimited):
+        gov.call(throttle)  # same second: one throttling episode
+    assert gov.rate == 1.0
+    clock.now += 1.0
+    with pytest.raises(RateLimited):
+        gov.call(throttle)
+    assert gov.rate == 0.5
+    clock.now += 1.0
+    with pytest.raises(RateLimited):
+        gov.call(throttle)
+    assert gov.rate == 0.5  # min_rate
+
+    for _ in range(20):
+        assert gov.call(lambda: "ok") == "ok"
+    assert gov.rate == 4.0  # max_rate
+
+
+def test_throttled_call_is_retried_with_backoff():
+    clock = FakeClock()
+    gov = governor(clock, burst=10, window=100)
+    answers = iter([throttle, throttle, lambda: "ok"])
+    assert gov.call(lambda: next(answers)()) == "ok"
+    assert gov.stats["retries"] == 2
+    assert [s for s in clock.sleeps if s >= 1.0] == [1.0, 2.0]
+
+
+def test_breaker_opens_then_half_opens():
+    clock = FakeClock()
+    gov = governor(clock, retries=0, burst=10, error_rate=0.75)
+    for _ in range(2):  # window // 2 calls, all failed
+        with pytest.raises(RateLimited):
+            gov.call(throttle)
+    assert gov.stats["breaker_trips"] == 1
+    assert gov.is_open
+
+    # the next call waits out the cooldown; a failure right after re-opens at once
+    start = clock.now
+    with pytest.raises(RateLimited):
+        gov.call(throttle)
+    assert clock.now - start >= 60.0
+    assert gov.stats["breaker_trips"] == 2
+
+    # after the next pause, one success closes it: single failures no longer trip
+    assert gov.call(lambda: "ok") == "ok"
+    assert not gov.is_open
+    with pytest.raises(RateLimited):
+        gov.call(throttle)
+    assert gov.stats["breaker_trips"] == 2
+
+
+def test_other_errors_count_towards_the_breaker_without_slowing_down():
+    clock = FakeClock()
+    gov = governor(clock, burst=10)
+
+    def reset():
+        raise ConnectionResetError("connection reset by peer")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionResetError):
+            gov.call(reset)
+    assert gov.stats["errors"] == 2
+    assert gov.stats["retries"] == 0
+    assert gov.rate == 2.0
+    assert gov.stats["breaker_trips"] == 1
+
+
+class FakeSource(DataSource):
+    name = "fake"
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def fetch(self, symbol, field):
+        self.calls += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_empty_info_is_a_miss_without_a_rate_limit_signal():
+    clock = FakeClock()
+    inner = FakeSource([{}])
+    source = GovernedSource(inner, governor=governor(clock))
+    assert source.fetch("9999.TW", "info") == {}
+    assert inner.calls == 1
+    assert source.governor.rate == 2.0
+    assert source.governor.stats["missing"] == 1
+
+
+def test_empty_info_after_a_429_is_retried():
+    clock = FakeClock()
+    inner = FakeSource([RuntimeError("429 Too Many Requests"), {}, {"trailingEps": 1.0}])
+    source = GovernedSource(inner, governor=governor(clock, burst=10))
+    assert source.fetch("2330.TW", "info") == {"trailingEps": 1.0}
+    assert inner.calls == 3
+    assert source.governor.stats["empty"] == 1
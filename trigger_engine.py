@@ -1,33 +1,61 @@
-import json
+import asyncio
+import csv
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import pandas as pd
-import yfinance as yf
 
 import config
+import metrics
+from fetch_engine import call_with_policy
+from state_store import StateStore
 from data_fetcher import (
+    SymbolSnapshot,
+    get_prices_bulk,
+    probe_bulk,
     get_trailing_eps,
-    get_dividend_by_year,
-    latest_dividend_snapshot,
     latest_news_ts,
 )
-from analyzer import estimate_yield_for_symbol
+from analyzer import (
+    YIELD_COLUMNS,
+    YieldInputs,
+    collect_yield_inputs,
+    compute_yield_table,
+    count_skips,
+    fetched_statements,
+    skip_reason,
+)
+from statements import StatementStore
+from dividend_store import dividend_events, latest_payout
+import incremental
+from history import HistoryStore
+from universe import record_quotes
+from checkpoint import Checkpoint
 
 
-def load_state():
-    if config.STATE_FILE.exists():
-        try:
-            return json.loads(config.STATE_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+@metrics.timed("state_load")
+def load_state(symbols=None):
+    """Load stored state for `symbols` (all if None) from the state DB."""
+    store = StateStore()
+    try:
+        return store.get(symbols)
+    finally:
+        store.close()
 
 
+@metrics.timed("state_save")
 def save_state(state: dict):
-    config.STATE_FILE.write_text(
-        json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    """Upsert every symbol in `state` in one atomic transaction."""
+    if not state:
+        return
+    store = StateStore()
+    try:
+        store.upsert_many(state)
+    finally:
+        store.close()
 
 
+@metrics.timed("trigger_detect")
 def detect_triggers(symbol: str, eps_now, latest_div_year, latest_div_amt, news_ts_now, state: dict):
     """Compare current snapshot vs previous snapshot.
 
@@ -35,6 +63,9 @@ def detect_triggers(symbol: str, eps_now, latest_div_year, latest_div_amt, news_
       - EPS change (trailingEps)
       - Dividend latest year or amount change
       - News timestamp updated (aux)
+
+    Price moves across the yield threshold are detected for all symbols at
+    once from the bulk probe prices (incremental.price_crossings).
     """
     prev = state.get(symbol, {})
     reasons = []
@@ -70,74 +101,467 @@ def detect_triggers(symbol: str, eps_now, latest_div_year, latest_div_amt, news_
     return (len(reasons) > 0), reasons
 
 
-def update_state_for_symbol(symbol: str, eps_now, latest_div_year, latest_div_amt, news_ts_now, state: dict):
+def update_state_for_symbol(symbol: str, eps_now, latest_div_year, latest_div_amt, news_ts_now, state: dict,
+                            probe=None):
+    now = datetime.now(timezone.utc).isoformat()
     state[symbol] = {
+        **state.get(symbol, {}),  # keeps the cached computed fields (incremental.py)
         "trailing_eps_ttm": eps_now,
         "latest_div_year": latest_div_year,
         "latest_div_amt": latest_div_amt,
         "latest_news_ts": news_ts_now,
-        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "probe": probe if probe is not None else state.get(symbol, {}).get("probe"),
+        "full_checked_at": now,
+        "updated_at": now,
     }
 
 
-def event_mode(symbols, years_for_payout, yield_threshold, force_recalc_all=False):
-    """Event-driven mode:
-    - Detect triggers for each symbol
-    - Recalculate yield only for triggered (or all if force_recalc_all)
-    - Update state.json
-    - Output ONLY rows with est_yield_% >= (yield_threshold*100) to CSV
+def needs_full_scan(symbol: str, probe, state: dict, now=None, max_age_days=None) -> bool:
+    """Tier-1 decision: does `symbol` need the full info/dividends/news fetch?
+
+    Yes when there is no stored state, the probe is unavailable or differs
+    from the stored one (new ex-dividend), or the symbol's periodic full
+    check is due (EPS and news have no cheap probe, so every symbol is
+    still fully re-checked every max_age_days).
+
+    The periodic checks are staggered: each symbol's period boundary is
+    shifted by a crc32 offset, so a universe first checked on one day is
+    re-checked about 1/max_age_days of it per day, not all at once.
     """
-    import pandas as pd
-    import yfinance as yf
-    from datetime import datetime
+    prev = state.get(symbol)
+    if not prev or probe is None or prev.get("probe") != probe:
+        return True
 
-    state = load_state()
-    triggered_symbols = []
-    trigger_log = []
+    checked = prev.get("full_checked_at")
+    if not checked:
+        return True
+    max_age_days = config.PROBE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    period = max_age_days * 86400
+    if period <= 0:
+        return True
+    now = now or datetime.now(timezone.utc)
+    try:
+        checked = datetime.fromisoformat(checked)
+    except (TypeError, ValueError):
+        return True
+    offset = zlib.crc32(symbol.encode("utf-8")) % max(1, int(period))
+
+    def slot(t):
+        return (t.timestamp() - offset) // period
+
+    return slot(now) > slot(checked)
+
+
+def statement_changed(reasons) -> bool:
+    """True when the trigger reasons include an EPS change (see detect_triggers)."""
+    return any(reason.startswith("EPS") for reason in reasons)
 
-    # First pass: detect triggers
-    for sym in symbols:
-        try:
-            tk = yf.Ticker(sym)
 
-            eps_now = get_trailing_eps(tk)
-            div_by_year = get_dividend_by_year(tk.dividends)
-            latest_year, latest_amt = latest_dividend_snapshot(div_by_year)
-            news_ts_now = latest_news_ts(tk)
+# payloads detect_triggers reads; scan_symbol fetches them fresh
+SCAN_FIELDS = ("info", "dividends", "news")
 
-            triggered, reasons = detect_triggers(
-                sym, eps_now, latest_year, latest_amt, news_ts_now, state
-            )
-            update_state_for_symbol(sym, eps_now, latest_year, latest_amt, news_ts_now, state)
 
-            if force_recalc_all:
-                triggered = True
-                if not reasons:
-                    reasons = ["Forced recalculation"]
+def scan_symbol(sym):
+    """Fetch the trigger fields for one symbol.
 
-            if triggered:
-                triggered_symbols.append(sym)
-                trigger_log.append({"symbol": sym, "reasons": reasons})
+    The trigger fields are always fetched from the source (SCAN_FIELDS
+    bypass the cache read): their cache TTLs are as long as the scan
+    cadence, so a cached copy would delay an EPS or dividend trigger by
+    a run. Returns (snapshot, (eps_now, latest_div_year, latest_div_amt,
+    news_ts_now)); the snapshot is kept for the recalculation of
+    triggered symbols.
+    """
+    snap = SymbolSnapshot(sym, refresh=SCAN_FIELDS)
+
+    eps_now = get_trailing_eps(snap)
+    latest_year, latest_amt = latest_payout(dividend_events(snap.dividends))
+    news_ts_now = latest_news_ts(snap)
+    return snap, (eps_now, latest_year, latest_amt, news_ts_now)
 
-        except Exception as e:
-            trigger_log.append({"symbol": sym, "reasons": [f"ERROR: {e}"]})
 
-    save_state(state)
+class StreamingCsv:
+    """High-yield rows appended to a CSV as they are found.
 
-    # Second pass: recalc yields for triggered
-    rows = []
+    The file is only created on the first row. finalize() rewrites it with
+    the final sorted table, so the end result matches a batch write.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+        self._writer = None
+
+    def write(self, row: dict):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "w", encoding="utf-8-sig", newline="")
+            self._writer = csv.writer(self._fh)
+            self._writer.writerow(YIELD_COLUMNS)
+        self._writer.writerow([row[c] for c in YIELD_COLUMNS])
+        self._fh.flush()
+
+    def finalize(self, df_high):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if df_high is not None and not df_high.empty:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with metrics.timed("to_csv"):
+                df_high.to_csv(self.path, index=False, encoding="utf-8-sig")
+            return True
+        return False
+
+
+async def _event_pipeline(symbols, years_for_payout, yield_threshold, force_recalc_all,
+                          workers, timeout, retries, state, on_row, probes=None, checkpoint=None, stored=None,
+                          incremental_recalc=True, extra_reasons=None):
+    """Scan symbols and stream triggered ones straight into recalculation.
+
+    Up to `workers` scans and `workers` recalculations run concurrently on a
+    thread pool. A triggered symbol is put on a bounded queue the moment
+    detect_triggers flags it; when recalculation falls behind, scanners
+    block on the queue (backpressure). on_row(row) is called for every
+    recalculated row as soon as it is computed. `probes` (from probe_bulk)
+    are stored with each scanned symbol's state and their prices are reused
+    by the recalculation, as are the quarter EPS in `stored`
+    (StatementStore.fresh_eps). With a `checkpoint`, each symbol is logged once
+    its work is finished: untriggered ones after the scan, triggered ones
+    after a successful recalculation.
+
+    With incremental_recalc, a triggered symbol whose state caches its
+    computed fields only recomputes what its trigger reasons affect (see
+    incremental.plan); no record is fetched for it, only its row.
+    `extra_reasons` ({symbol: [reason]}, e.g. price crossings) are added
+    to what detect_triggers finds and trigger the symbol on their own.
+
+    Returns (scanned, records, rows, recalc_errors), keyed by symbol.
+    """
+    loop = asyncio.get_running_loop()
+    workers = max(1, config.FETCH_WORKERS if workers is None else workers)
+    timeout = config.FETCH_TIMEOUT if timeout is None else timeout
+    retries = config.FETCH_RETRIES if retries is None else retries
+
+    pool = ThreadPoolExecutor(max_workers=workers * 2 + 1)
+    queue = asyncio.Queue(maxsize=config.EVENT_QUEUE_SIZE)
+    sem = asyncio.Semaphore(workers)
+
+    scanned = {}  # sym -> {"triggered": bool, "reasons": [...]}
+    snapshots = {}
+    records = {}
+    rows = {}
+    recalc_errors = {}
+    probes = probes or {}
+    extra_reasons = extra_reasons or {}
+    price_task = None
+
+    def blocking(fn, sym, stage):
+        return loop.run_in_executor(pool, call_with_policy, fn, sym, timeout, retries, None, stage)
+
+    async def prices():
+        # one bulk quote download, started by the first triggered symbol
+        nonlocal price_task
+        if price_task is None:
+            missing = [s for s in symbols if s not in probes]
+            price_task = loop.run_in_executor(pool, get_prices_bulk, missing)
+        price_map = await price_task
+        return {**{s: p["price"] for s, p in probes.items()}, **price_map}
+
+    async def scan(sym):
+        async with sem:
+            fetched, err = await blocking(scan_symbol, sym, "scan")
+            try:
+                if err is not None:
+                    raise err
+                snap, (eps_now, latest_year, latest_amt, news_ts_now) = fetched
+
+                triggered, reasons = detect_triggers(
+                    sym, eps_now, latest_year, latest_amt, news_ts_now, state
+                )
+                if sym in extra_reasons:
+                    reasons = reasons + extra_reasons[sym]
+                    triggered = True
+                update_state_for_symbol(sym, eps_now, latest_year, latest_amt, news_ts_now, state,
+                                        probe=probes.get(sym, {}).get("probe"))
+
+                if force_recalc_all:
+                    triggered = True
+                    if not reasons:
+                        reasons = ["Forced recalculation"]
+
+                scanned[sym] = {"triggered": triggered, "reasons": reasons}
+                if triggered:
+                    snapshots[sym] = snap  # reused by the recalculation
+                    await queue.put(sym)
+                elif checkpoint is not None:
+                    checkpoint.add(sym, {"scanned": scanned[sym], "state": dict(state[sym])})
+
+            except Exception as e:
+                scanned[sym] = {"triggered": False, "reasons": [f"ERROR: {e}"]}
+
+    async def recalc_worker():
+        while True:
+            sym = await queue.get()
+            try:
+                if sym is None:
+                    return
+                price_map = await prices()
+                price = price_map.get(sym)
+                dirty = None
+                if incremental_recalc and price:
+                    dirty = incremental.plan(state.get(sym), scanned[sym]["reasons"], years_for_payout)
+
+                if dirty is None:
+                    # a new trailingEps means a new quarter: refetch the statement even if
+                    # StatementStore.due() does not expect one yet
+                    fresh = None if statement_changed(scanned[sym]["reasons"]) else stored
+
+                    def recalc(s):
+                        record = collect_yield_inputs(s, snapshot=snapshots.pop(s, None), price=price, stored=fresh)
+                        return record, incremental.record_row(record, years_for_payout)
+
+                    result, err = await blocking(recalc, sym, "recalc")
+                    if err is not None:
+                        recalc_errors[sym] = err
+                        continue
+                    record, (row, nodes) = result
+                    records[sym] = record
+                    state[sym].update(nodes)
+                    entry = {"record": record, "row": row}
+                else:
+                    snap = snapshots.pop(sym, None) or SymbolSnapshot(sym)
+
+                    def recompute(s):
+                        div_events = dividend_events(snap.dividends) if "avg_payout_ratio" in dirty else None
+                        return incremental.recompute_row(s, state[s], dirty, price, div_events, years_for_payout)
+
+                    result, err = await blocking(recompute, sym, "recompute")
+                    if err is not None:
+                        recalc_errors[sym] = err
+                        continue
+                    row, nodes = result
+                    state[sym].update(nodes)
+                    entry = {"row": row}
+                metrics.count("recalc", path="full" if dirty is None else "incremental")
+                rows[sym] = row
+                if checkpoint is not None:
+                    checkpoint.add(sym, {"scanned": scanned[sym], "state": dict(state[sym]), **entry})
+                if row is not None:
+                    on_row(row)
+            except Exception as e:
+                # a dead consumer would leave scanners blocked on the queue
+                recalc_errors.setdefault(sym, e)
+            finally:
+                queue.task_done()
+
+    consumers = [asyncio.create_task(recalc_worker()) for _ in range(workers)]
+    try:
+        await asyncio.gather(*(scan(sym) for sym in symbols))
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+    finally:
+        for task in consumers:
+            task.cancel()
+        pool.shutdown(wait=False)
+
+    return scanned, records, rows, recalc_errors
+
+
+# state fields whose change is worth a write in persist="changed" mode
+TRACKED_STATE_FIELDS = ("trailing_eps_ttm", "latest_div_year", "latest_div_amt", "latest_news_ts", "probe",
+                        *incremental.CACHED_NODES)
+
+
+def changed_symbols(before: dict, state: dict, symbols) -> list:
+    """Symbols whose tracked state fields differ between `before` and `state`."""
+    out = []
+    for sym in symbols:
+        old, new = before.get(sym) or {}, state.get(sym) or {}
+        if any(old.get(f) != new.get(f) for f in TRACKED_STATE_FIELDS):
+            out.append(sym)
+    return out
+
+
+def event_mode(symbols, years_for_payout, yield_threshold, force_recalc_all=False,
+               workers=None, timeout=None, retries=None, probe=True,
+               state=None, persist="scanned", probe_max_age_days=None, checkpoint=False, resume=False,
+               scenarios=None):
+    """Event-driven mode:
+    - Detect triggers for each symbol
+    - Recalculate yield only for triggered (or all if force_recalc_all)
+    - Upsert the scanned symbols' state in the state DB
+    - Output ONLY rows with est_yield_% >= (yield_threshold*100) to CSV
+
+    Triggered symbols are recalculated while the scan is still running
+    (see _event_pipeline): each recalculated row is printed right away and
+    high-yield rows are appended to the CSV as they appear. The summary
+    below is assembled in symbol order, so it matches a sequential run.
+
+    With probe=True a batched probe (probe_bulk) runs first and only symbols
+    whose probe changed, or whose last full check is older than
+    PROBE_MAX_AGE_DAYS, get the full fetch (see needs_full_scan). Its prices
+    also drive the price trigger: symbols whose price crossed their
+    breakeven for the threshold (incremental.price_crossings) are
+    triggered, and those needing no full fetch are repriced in one
+    vectorized pass from their cached fields (with scenarios, they are
+    scanned and fully recalculated instead).
+
+    Unless force_recalc_all or scenarios are given, triggered symbols whose
+    state caches their computed fields are recomputed incrementally: only
+    the fields their trigger reasons affect, with no statement fetch (see
+    incremental.py).
+
+    A long-running caller can pass its in-memory `state` dict (updated in
+    place) instead of reloading it from the DB, and persist="changed" to
+    write only symbols whose tracked fields changed.
+
+    With checkpoint=True finished symbols (scan state, plus the fetched
+    inputs of triggered ones) are checkpointed during the pass, and
+    resume=True restores them from an interrupted run over the same
+    symbols instead of scanning them again. The state DB is still written
+    once, at the end.
+    """
+    import pandas as pd
+    from datetime import datetime
+
+    symbols = list(symbols)
+    if state is None:
+        state = load_state(symbols)
+
+    threshold_pct = float(yield_threshold) * 100.0
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_path = config.RESULT_DIR / f"event_high_yield_{int(threshold_pct)}pct_{ts}.csv"
+    stream = StreamingCsv(out_path)
+
+    def on_row(row):
+        hit = row["est_yield_%"] >= threshold_pct
+        print(f"[{'HIT' if hit else 'RECALC'}] {row['symbol']}: est_yield_% = {row['est_yield_%']} "
+              f"(price {row['price']}, est_dividend {row['est_dividend']})", flush=True)
+        if hit:
+            stream.write(row)
+
+    scan_symbols = symbols
+    probes = {}
+    price_reasons = {}
+    price_only = []
+    if probe:
+        covered = set()
+        probes = probe_bulk(symbols, covered=covered)
+        record_quotes(covered, probes)
+        if not force_recalc_all:
+            scan_symbols = [
+                sym for sym in symbols
+                if needs_full_scan(sym, probes.get(sym, {}).get("probe"), state, max_age_days=probe_max_age_days)
+            ]
+            prices = {sym: p["price"] for sym, p in probes.items()}
+            price_reasons = incremental.price_crossings(symbols, prices, state, yield_threshold, years_for_payout)
+            full = set(scan_symbols)
+            if scenarios:
+                # scenario columns need the full inputs: crossed symbols go through the scan
+                scan_symbols = [sym for sym in symbols if sym in full or sym in price_reasons]
+            else:
+                price_only = [sym for sym in symbols if sym in price_reasons and sym not in full]
+        print(f"[PROBE] {len(symbols) - len(scan_symbols)}/{len(symbols)} unchanged, "
+              f"full fetch for {len(scan_symbols)}, price crossed threshold for {len(price_reasons)}", flush=True)
+    repriced = incremental.reprice(price_only, prices, state) if price_only else pd.DataFrame(columns=YIELD_COLUMNS)
+    for row in repriced.to_dict("records"):
+        on_row(row)
+
+    before = {sym: dict(state[sym]) for sym in scan_symbols if sym in state}
+
+    ckpt = None
+    done = {}
+    if checkpoint or resume:
+        ckpt = Checkpoint("event", symbols, extra=(f"force={bool(force_recalc_all)}",))
+        done = ckpt.start(resume)
+    for sym in scan_symbols:
+        if sym in done:
+            state[sym] = done[sym]["state"]
+
+    statements = StatementStore()
+    try:
+        scanned, records_by_sym, rows_by_sym, recalc_errors = asyncio.run(_event_pipeline(
+            [sym for sym in scan_symbols if sym not in done], years_for_payout, yield_threshold,
+            force_recalc_all, workers, timeout, retries, state, on_row, probes=probes, checkpoint=ckpt,
+            stored=statements.fresh_eps(scan_symbols),
+            incremental_recalc=not force_recalc_all and not scenarios, extra_reasons=price_reasons,
+        ))
+        for sym in scan_symbols:
+            if sym in done:
+                scanned[sym] = done[sym]["scanned"]
+                if "record" in done[sym]:
+                    records_by_sym[sym] = done[sym]["record"]
+                if "row" in done[sym]:
+                    rows_by_sym[sym] = done[sym]["row"]
+                elif "record" in done[sym]:
+                    rows_by_sym[sym] = incremental.record_row(done[sym]["record"], years_for_payout)[0]
+        statements.merge(fetched_statements(records_by_sym.values()))
+        repriced = repriced.set_index("symbol", drop=False)
+        for sym in price_only:
+            scanned[sym] = {"triggered": True, "reasons": price_reasons[sym]}
+            rows_by_sym[sym] = repriced.loc[sym].to_dict() if sym in repriced.index else None
+    finally:
+        statements.close()
+        if ckpt:
+            ckpt.flush()
+    to_save = changed_symbols(before, state, scan_symbols) if persist == "changed" else scan_symbols
+    # repriced symbols always: their stored price is the next crossing's reference
+    save_state({sym: state[sym] for sym in [*to_save, *price_only] if sym in state})
+
+    triggered_symbols = [sym for sym in symbols if scanned.get(sym, {}).get("triggered")]
+    metrics.count("event_symbols", len(symbols) - len(scan_symbols) - len(price_only), outcome="probe_unchanged")
+    metrics.count("event_symbols", len(price_only), outcome="repriced")
+    metrics.count("event_symbols", len(triggered_symbols), outcome="triggered")
+    metrics.count("event_symbols", sum(1 for s in scan_symbols if s in scanned and not scanned[s]["triggered"]),
+                  outcome="not_triggered")
+    metrics.count("event_symbols", len(recalc_errors), outcome="recalc_failed")
     for sym in triggered_symbols:
-        try:
-            reasons = next((x["reasons"] for x in trigger_log if x["symbol"] == sym), [])
-            row, _tk = estimate_yield_for_symbol(sym, years_for_payout, trigger_reasons=reasons)
-            if row is not None:
-                rows.append(row)
-        except Exception as e:
-            trigger_log.append({"symbol": sym, "reasons": [f"RECALC ERROR: {e}"]})
-
-    df_trig = pd.DataFrame(rows)
+        metrics.note_symbol(sym, triggered=True, reasons=scanned[sym]["reasons"])
+    # triggered symbols and scan errors, in symbol order
+    trigger_log = [
+        {"symbol": sym, "reasons": scanned[sym]["reasons"]}
+        for sym in symbols
+        if scanned.get(sym, {}).get("reasons")
+    ]
+    trigger_log += [
+        {"symbol": sym, "reasons": [f"RECALC ERROR: {recalc_errors[sym]}"]}
+        for sym in triggered_symbols
+        if sym in recalc_errors
+    ]
+    records = [records_by_sym[sym] for sym in triggered_symbols if sym in records_by_sym]
+    # rows recomputed from cached fields (incremental.py), without a record
+    partial = pd.DataFrame(
+        [rows_by_sym[sym] for sym in triggered_symbols if sym not in records_by_sym and rows_by_sym.get(sym)],
+        columns=YIELD_COLUMNS,
+    )
+
+    inputs = YieldInputs(records)
+    if scenarios:
+        # the scenario columns need the quarter EPS of every record
+        df_trig = compute_yield_table(inputs, years_for_payout, scenarios=scenarios)
+        if not partial.empty:
+            df_trig = partial if df_trig.empty else pd.concat([df_trig, partial], ignore_index=True)
+    else:
+        # the rows the pipeline already streamed, in symbol order
+        df_trig = pd.DataFrame(
+            [rows_by_sym[sym] for sym in triggered_symbols if rows_by_sym.get(sym)], columns=YIELD_COLUMNS
+        )
+        count_skips(pd.Series({r["symbol"]: skip_reason(r, rows_by_sym.get(r["symbol"])) for r in records},
+                              dtype=object))
+
+    scalars = pd.DataFrame.from_dict(
+        {sym: state[sym] for sym in symbols if sym in state}, orient="index"
+    ).drop(columns=["updated_at", *incremental.STATE_FIELDS], errors="ignore")
+    scalars = scalars.combine_first(inputs.history_scalars(df_trig)) if records else scalars
+    scalars = scalars.combine_first(partial.set_index("symbol")) if not partial.empty else scalars
+    HistoryStore().append("event", list(scalars.index), scalars=scalars, inputs=inputs)
+
     if not df_trig.empty:
         df_trig = df_trig.sort_values("est_yield_%", ascending=False)
+    # for in-process consumers (daemon listeners), not written to the CSV
+    df_trig.attrs["trigger_reasons"] = {item["symbol"]: item["reasons"] for item in trigger_log}
+    # recalculated without error; a symbol here with no row has no valid yield any more
+    df_trig.attrs["recalculated"] = [sym for sym in triggered_symbols if sym not in recalc_errors]
 
     print("\n=== Triggered Symbols (this run) ===")
     print(triggered_symbols if triggered_symbols else "(none)")
@@ -150,7 +574,6 @@ def event_mode(symbols, years_for_payout, yield_threshold, force_recalc_all=Fals
     print(df_trig if not df_trig.empty else "(no triggered & valid rows)")
 
     # High yield filter
-    threshold_pct = float(yield_threshold) * 100.0
     if not df_trig.empty:
         df_high = df_trig[df_trig["est_yield_%"] >= threshold_pct]
     else:
@@ -161,19 +584,12 @@ def event_mode(symbols, years_for_payout, yield_threshold, force_recalc_all=Fals
 
     # ✅ Output ONLY high-yield rows
     # - If none, no file is written.
-    if not df_high.empty:
-        out_dir = getattr(config, "RESULT_DIR", None)
-        if out_dir is None:
-            # fallback if you didn't add RESULT_DIR in config.py
-            from pathlib import Path
-            out_dir = Path("result")
-            out_dir.mkdir(exist_ok=True)
-
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_path = out_dir / f"event_high_yield_{int(threshold_pct)}pct_{ts}.csv"
-        df_high.to_csv(out_path, index=False, encoding="utf-8-sig")
+    if stream.finalize(df_high):
         print(f"\n✅ 只輸出 >= {int(threshold_pct)}% 到檔案：{out_path}")
     else:
         print(f"\n(沒有 >= {int(threshold_pct)}% 的觸發標的，所以不輸出檔案)")
 
-    return df_trig, df_high
\ No newline at end of file
+    if ckpt:
+        ckpt.discard()
+
+    return df_trig, df_high
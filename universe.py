@@ -0,0 +1,220 @@
+import csv
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+
+import config
+
+
+class UniverseRegistry:
+    """The symbol universe with listing metadata, in SQLite.
+
+    One row per ticker: name, market (TW = TWSE, TWO = TPEx), sector and
+    an active flag, with indexes on market, sector and active. The table is
+    seeded from universe.csv (config.UNIVERSE_FILE) and re-synced whenever
+    that file is newer than the last sync; edits to name/market/sector in
+    the CSV win, while active/failure bookkeeping stays in the DB.
+
+    Symbols that return no quote on DELIST_AFTER_FAILURES different days
+    are marked inactive and dropped from the default selection; an
+    inactive symbol that quotes again (e.g. run via --symbols) is
+    reactivated.
+    """
+
+    COLUMNS = {
+        "name": "TEXT",
+        "market": "TEXT",
+        "sector": "TEXT",
+        "active": "INTEGER NOT NULL DEFAULT 1",
+        "fail_count": "INTEGER NOT NULL DEFAULT 0",
+        "last_fail_date": "TEXT",
+        "last_quote_date": "TEXT",
+        "updated_at": "TEXT",
+    }
+    INDEXES = ("market", "sector", "active")
+
+    def __init__(self, path=None, seed_file=None):
+        self.path = Path(path if path is not None else config.UNIVERSE_DB)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+        seed_file = config.UNIVERSE_FILE if seed_file is None else seed_file
+        if seed_file and Path(seed_file).exists():
+            mtime = str(Path(seed_file).stat().st_mtime)
+            if self._meta("seed_mtime") != mtime:
+                self.import_csv(seed_file)
+                self._set_meta("seed_mtime", mtime)
+
+    def _ensure_schema(self):
+        cols = ", ".join(f"{name} {typ}" for name, typ in self.COLUMNS.items())
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS universe (symbol TEXT PRIMARY KEY, {cols})")
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(universe)")}
+            for name, typ in self.COLUMNS.items():
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE universe ADD COLUMN {name} {typ}")
+            for col in self.INDEXES:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS universe_{col} ON universe ({col})")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (key, value),
+            )
+
+    def count(self, active=None) -> int:
+        if active is None:
+            return self.conn.execute("SELECT COUNT(*) FROM universe").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM universe WHERE active = ?", (int(active),)).fetchone()[0]
+
+    def import_csv(self, path):
+        """Insert or update symbols from a symbol,name,market,sector CSV."""
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = [r for r in csv.DictReader(f) if (r.get("symbol") or "").strip()]
+        self.upsert(rows)
+        return len(rows)
+
+    def upsert(self, rows):
+        """rows: dicts with symbol and any of name / market / sector."""
+        now = datetime.now().isoformat(timespec="seconds")
+        params = []
+        for r in rows:
+            sym = r["symbol"].strip()
+            market = (r.get("market") or sym.rpartition(".")[2]).strip().upper()
+            params.append((sym, (r.get("name") or "").strip() or None, market,
+                           (r.get("sector") or "").strip().lower() or None, now))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO universe (symbol, name, market, sector, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET name=excluded.name, market=excluded.market, "
+                "sector=excluded.sector, updated_at=excluded.updated_at",
+                params,
+            )
+
+    def select(self, sector=None, market=None, active=True) -> list:
+        """Symbols matching every given filter, in symbol order.
+
+        sector / market may be a string or a list; active=None ignores the flag.
+        """
+        where, params = [], []
+        for col, value in (("sector", sector), ("market", market)):
+            if value:
+                values = [value] if isinstance(value, str) else list(value)
+                values = [v.lower() if col == "sector" else v.upper() for v in values]
+                where.append(f"{col} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if active is not None:
+            where.append("active = ?")
+            params.append(int(active))
+        sql = "SELECT symbol FROM universe"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return [row[0] for row in self.conn.execute(sql + " ORDER BY symbol", params)]
+
+    def get(self, symbol):
+        names = list(self.COLUMNS)
+        row = self.conn.execute(f"SELECT {', '.join(names)} FROM universe WHERE symbol = ?", (symbol,)).fetchone()
+        return dict(zip(names, row)) if row else None
+
+    def summary(self):
+        """[(market, sector, active, n)] for every combination present."""
+        return self.conn.execute(
+            "SELECT market, sector, active, COUNT(*) FROM universe GROUP BY market, sector, active "
+            "ORDER BY market, sector, active DESC"
+        ).fetchall()
+
+    def record_quotes(self, symbols, quoted, today=None, delist_after=None):
+        """Update listing status from one batched quote request.
+
+        `quoted` is the set of symbols that came back with a price. Misses
+        count at most once per day, and a run where nothing quoted at all
+        (an outage, not a delisting) counts for nobody. Returns the symbols
+        deactivated by this call.
+        """
+        symbols = list(symbols)
+        quoted = set(quoted)
+        if not symbols or not quoted:
+            return []
+        today = (today or date.today()).isoformat()
+        delist_after = config.DELIST_AFTER_FAILURES if delist_after is None else delist_after
+        now = datetime.now().isoformat(timespec="seconds")
+
+        hits = [(today, now, s) for s in symbols if s in quoted]
+        misses = [(today, now, s, today) for s in symbols if s not in quoted]
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE universe SET active = 1, fail_count = 0, last_quote_date = ?, updated_at = ? "
+                "WHERE symbol = ?",
+                hits,
+            )
+            self.conn.executemany(
+                "UPDATE universe SET fail_count = fail_count + 1, last_fail_date = ?, updated_at = ? "
+                "WHERE symbol = ? AND (last_fail_date IS NULL OR last_fail_date <> ?)",
+                misses,
+            )
+            missed = [m[2] for m in misses]
+            dropped = []
+            for i in range(0, len(missed), 500):
+                chunk = missed[i:i + 500]
+                marks = ", ".join("?" * len(chunk))
+                dropped += [row[0] for row in self.conn.execute(
+                    f"SELECT symbol FROM universe WHERE active = 1 AND fail_count >= ? AND symbol IN ({marks})",
+                    [delist_after, *chunk],
+                )]
+            self.conn.executemany("UPDATE universe SET active = 0 WHERE symbol = ?", [(s,) for s in dropped])
+        for sym in dropped:
+            print(f"[UNIVERSE] {sym}: no quote on {delist_after} days, marked inactive")
+        return dropped
+
+    def close(self):
+        self.conn.close()
+
+
+def record_quotes(symbols, quoted):
+    """Feed one run's bulk quote results into the default registry.
+
+    `symbols` are the ones whose quote request actually went through (the
+    `covered` set of probe_bulk / get_prices_bulk), so a failed chunk is
+    not taken for delistings. Only Yahoo's answers count: replayed or
+    synthetic runs leave the registry alone.
+    """
+    from data_fetcher import get_source
+
+    if get_source().name not in ("live", "record"):
+        return []
+    reg = UniverseRegistry()
+    try:
+        return reg.record_quotes(symbols, quoted)
+    finally:
+        reg.close()
+
+
+def select_symbols(sector=None, market=None, include_inactive=False):
+    reg = UniverseRegistry()
+    try:
+        return reg.select(sector=sector, market=market, active=None if include_inactive else True)
+    finally:
+        reg.close()
+
+
+def universe_mode(sector=None, market=None):
+    """Print the registry by market / sector / status."""
+    reg = UniverseRegistry()
+    try:
+        print(f"=== Universe ({reg.path}): {reg.count(active=True)} active / {reg.count()} total ===")
+        sectors = {s.lower() for s in ([sector] if isinstance(sector, str) else sector or [])}
+        markets = {m.upper() for m in ([market] if isinstance(market, str) else market or [])}
+        for mkt, sec, active, n in reg.summary():
+            if (sectors and sec not in sectors) or (markets and mkt not in markets):
+                continue
+            print(f"- {mkt:<4} {sec or '-':<20} {'active' if active else 'inactive':<9} {n}")
+    finally:
+        reg.close()